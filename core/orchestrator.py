@@ -6,7 +6,7 @@ Initializes the virtual network, nodes, and services
 import time
 import logging
 import threading
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List
 from network.virtual_network import VirtualNetwork, VirtualNode
 from auth.authentication import AuthenticationManager, OTPManager, EmailNotifier
 from auth.ssh_handler import SSHKeyManager, SSHNodeManager
@@ -53,6 +53,9 @@ class P2PStorageOrchestrator:
         self.nodes: Dict[str, VirtualNode] = {}
         self.is_running = False
         
+        # Callbacks run after the node set or network state changes
+        self._topology_listeners: List[Callable[[], None]] = []
+        
         logger.info(f"[ORCHESTRATOR] P2P Storage System initialized")
         logger.info(f"[ORCHESTRATOR] Network: {network_name}, Nodes: {node_count}, "
                    f"Storage/Node: {storage_per_node_gb}GB")
@@ -86,16 +89,31 @@ class P2PStorageOrchestrator:
             logger.info(f"[ORCHESTRATOR] Node {node_id} created: {ip_address}")
         
         logger.info(f"[ORCHESTRATOR] All {self.node_count} nodes initialized")
+        self._notify_topology_changed()
     
     def start_network(self):
         """Start the virtual network"""
         self.is_running = True
         logger.info("[ORCHESTRATOR] Virtual network started")
+        self._notify_topology_changed()
     
     def stop_network(self):
         """Stop the virtual network"""
         self.is_running = False
         logger.info("[ORCHESTRATOR] Virtual network stopped")
+        self._notify_topology_changed()
+    
+    def add_topology_listener(self, callback: Callable[[], None]):
+        """Register a callback to run whenever nodes are added or the network starts/stops"""
+        self._topology_listeners.append(callback)
+    
+    def _notify_topology_changed(self):
+        """Run topology listeners; a failing listener is logged and skipped"""
+        for callback in list(self._topology_listeners):
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"[ORCHESTRATOR] Topology listener failed: {e}")
     
     def broadcast_health_check(self):
         """Perform network-wide health check"""
@@ -153,7 +153,8 @@ class JSONRPCServer:
                 chunk_number=params['chunk_number'],
                 data=data,
                 size_bytes=len(data),
-                checksum=params['checksum']
+                checksum=params['checksum'],
+                checksum_algo=params.get('checksum_algo', 'sha256')
             )
             
             self.virtual_node.storage.store_segment(segment)
@@ -183,7 +184,8 @@ class JSONRPCServer:
                     'segment_id': segment.segment_id,
                     'chunk_number': segment.chunk_number,
                     'data_b64': data_b64,
-                    'checksum': segment.checksum,
+                    'checksum': segment.checksum.hex(),
+                    'checksum_algo': segment.checksum_algo,
                     'size_bytes': len(segment.data)
                 }
             else:
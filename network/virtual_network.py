@@ -39,11 +39,16 @@ class NetworkPacket:
     checksum: int = 0
     
     def calculate_checksum(self) -> int:
-        """Calculate simple checksum for packet integrity"""
-        checksum = 0
-        for byte in self.payload:
-            checksum ^= byte
-        return checksum
+        """Calculate simple checksum for packet integrity (XOR of all payload bytes)"""
+        # Fold the payload as one big integer, XORing byte-aligned halves,
+        # instead of looping over every byte in Python
+        value = int.from_bytes(self.payload, 'little')
+        width = len(self.payload)
+        while width > 1:
+            half = (width + 1) // 2
+            value = (value & ((1 << (half * 8)) - 1)) ^ (value >> (half * 8))
+            width = half
+        return value
     
     def __repr__(self):
         return f"Packet({self.packet_type.value}, {self.source_ip}->{self.destination_ip}, {len(self.payload)}B)"
@@ -4,17 +4,132 @@ Implements distributed storage across multiple nodes with file chunking
 """
 
 import os
+import errno
+import glob
 import hashlib
 import json
+import mmap
+import queue
 import shutil
+import sys
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, TextIO, Tuple
 from datetime import datetime
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Per-chunk checksum algorithms. Chunk checksums only guard against corruption
+# in transit/at rest, so they do not need to be cryptographic; the file hash
+# used for content addressing is always SHA-256. Digests are kept as raw
+# bytes and only hex-encoded for serialization.
+CHECKSUM_ALGORITHMS = {
+    'sha256': lambda data: hashlib.sha256(data).digest(),
+    'blake2b': lambda data: hashlib.blake2b(data, digest_size=16).digest(),
+    'crc32': lambda data: zlib.crc32(data).to_bytes(4, 'big'),
+}
+DEFAULT_CHECKSUM_ALGO = 'crc32'
+
+# Number of chunks fetched and written concurrently during reconstruction
+RECONSTRUCT_WORKERS = 16
+
+# Number of chunks read ahead of hashing while chunking a file
+PREFETCH_DEPTH = 4
+
+# Buffer/offset/length alignment required by O_DIRECT writes
+DIRECT_IO_ALIGNMENT = 4096
+
+# Number of files whose pack and index stay open between chunk stores
+OPEN_PACKS_MAX = 32
+
+if hasattr(os, 'pwrite'):
+    _pwrite = os.pwrite
+else:
+    _pwrite_lock = threading.Lock()
+
+    def _pwrite(fd: int, data: bytes, offset: int) -> int:
+        """Positional write fallback for platforms without os.pwrite (Windows)"""
+        with _pwrite_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            return os.write(fd, data)
+
+if hasattr(os, 'pread'):
+    _pread = os.pread
+else:
+    def _pread(fd: int, size: int, offset: int) -> bytes:
+        """Positional read fallback for platforms without os.pread (Windows)"""
+        with _pwrite_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            return os.read(fd, size)
+
+
+def _split_segment_id(segment_id: str) -> Tuple[Optional[str], int]:
+    """Split a "<file_id>_chunk_<n>" segment ID into (file_id, n); (None, 0) for other IDs"""
+    file_id, sep, chunk = segment_id.rpartition('_chunk_')
+    if sep and chunk.isdigit():
+        return file_id, int(chunk)
+    return None, 0
+
+
+def _prefetch_chunks(f, chunk_size: int, depth: int = PREFETCH_DEPTH):
+    """
+    Yield successive chunks of a binary file object
+    A background thread reads up to `depth` chunks ahead, so disk reads
+    overlap with whatever the caller does with each chunk
+    """
+    chunks = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        try:
+            while not stop.is_set():
+                data = f.read(chunk_size)
+                # Streams may return short reads before EOF - fill the chunk
+                while data and len(data) < chunk_size:
+                    more = f.read(chunk_size - len(data))
+                    if not more:
+                        break
+                    data += more
+                if not data:
+                    break
+                chunks.put(data)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            chunks.put(None)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    try:
+        while True:
+            data = chunks.get()
+            if data is None:
+                break
+            yield data
+    finally:
+        # Unblock the reader if the caller stopped early
+        stop.set()
+        while thread.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+    if errors:
+        raise errors[0]
+
+
+def _aligned_buffer(data: bytes) -> mmap.mmap:
+    """Copy data into a page-aligned buffer padded to the O_DIRECT block size"""
+    length = -(-len(data) // DIRECT_IO_ALIGNMENT) * DIRECT_IO_ALIGNMENT
+    buf = mmap.mmap(-1, length)
+    buf.write(data)
+    return buf
+
 
 @dataclass
 class FileSegment:
@@ -24,12 +139,18 @@ class FileSegment:
     chunk_number: int
     data: bytes
     size_bytes: int
-    checksum: str
+    checksum: bytes
+    checksum_algo: str = 'sha256'
     timestamp: datetime = field(default_factory=datetime.now)
     
-    def calculate_checksum(self) -> str:
+    def __post_init__(self):
+        # Accept hex-encoded checksums (RPC payloads, older callers)
+        if isinstance(self.checksum, str):
+            self.checksum = bytes.fromhex(self.checksum)
+    
+    def calculate_checksum(self) -> bytes:
         """Calculate checksum for data integrity"""
-        return hashlib.sha256(self.data).hexdigest()
+        return CHECKSUM_ALGORITHMS[self.checksum_algo](self.data)
 
 
 @dataclass
@@ -44,6 +165,7 @@ class FileMetadata:
     chunks: Dict[int, str] = field(default_factory=dict)  # chunk_num -> node_id
     created_at: datetime = field(default_factory=datetime.now)
     replicas: int = 1  # Number of replicas for redundancy
+    checksum_algo: str = 'sha256'  # Algorithm used for per-chunk checksums
     
     def to_dict(self) -> Dict:
         """Convert metadata to dictionary"""
@@ -56,8 +178,13 @@ class FileMetadata:
             'total_chunks': self.total_chunks,
             'chunks': self.chunks,
             'created_at': self.created_at.isoformat(),
-            'replicas': self.replicas
+            'replicas': self.replicas,
+            'checksum_algo': self.checksum_algo
         }
+    
+    def chunk_offset(self, chunk_number: int) -> int:
+        """Byte offset of a chunk within the original file"""
+        return chunk_number * self.chunk_size_bytes
 
 
 class VirtualStorage:
@@ -66,17 +193,20 @@ class VirtualStorage:
     Each node has its own virtual storage allocating real disk space
     """
     
-    def __init__(self, node_id: str, capacity_gb: float = 10.0):
+    def __init__(self, node_id: str, capacity_gb: float = 10.0, direct_io: bool = False):
         """
         Initialize virtual storage for a node
         
         Args:
             node_id: Node identifier
             capacity_gb: Storage capacity in GB
+            direct_io: Write segments and reconstructed files with O_DIRECT,
+                bypassing the page cache (falls back to buffered I/O where unsupported)
         """
         self.node_id = node_id
         self.capacity_gb = capacity_gb
         self.capacity_bytes = int(capacity_gb * 1024 * 1024 * 1024)
+        self.direct_io = direct_io and hasattr(os, 'O_DIRECT')
         
         # Create actual storage directory on host machine
         self.storage_root = f"./node_storage/{node_id}"
@@ -86,6 +216,14 @@ class VirtualStorage:
         self.file_segments: Dict[str, FileSegment] = {}  # segment_id -> FileSegment
         self.file_metadata: Dict[str, FileMetadata] = {}  # file_id -> FileMetadata
         
+        # Per-file packs of chunk data on disk
+        self._pack_index: Dict[str, Dict[int, Tuple[int, int, bytes, str]]] = {}  # file_id -> {chunk: (offset, size, checksum, algo)}
+        self._pack_tails: Dict[str, int] = {}  # file_id -> next free offset in the pack
+        self._pack_locks: Dict[str, threading.Lock] = {}  # file_id -> lock over its pack and index files
+        self._open_packs: Dict[str, Tuple[int, bool, TextIO]] = {}  # file_id -> (pack fd, O_DIRECT, index file), oldest first
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()  # Serializes metadata.json rewrites
+        
         # Track used space
         self.used_bytes = 0
         
@@ -96,7 +234,8 @@ class VirtualStorage:
         logger.info(f"[STORAGE {node_id}] Virtual storage initialized: {capacity_gb}GB "
                    f"at {self.storage_root}")
     
-    def chunk_file(self, file_path: str, chunk_size_bytes: int = 64 * 1024) -> Tuple[str, List[FileSegment]]:
+    def chunk_file(self, file_path: str, chunk_size_bytes: int = 64 * 1024,
+                   checksum_algo: str = DEFAULT_CHECKSUM_ALGO) -> Tuple[str, List[FileSegment]]:
         """
         Chunk a file into segments for distributed storage
         Each chunk is a segment stored independently
@@ -104,6 +243,7 @@ class VirtualStorage:
         Args:
             file_path: Path to file to chunk
             chunk_size_bytes: Size of each chunk (default 64KB)
+            checksum_algo: Per-chunk checksum algorithm (see CHECKSUM_ALGORITHMS)
             
         Returns:
             Tuple of (file_id, list of FileSegments)
@@ -111,34 +251,59 @@ class VirtualStorage:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        file_size = os.path.getsize(file_path)
-        file_hash = self._calculate_file_hash(file_path)
+        with open(file_path, 'rb') as f:
+            return self.chunk_file_stream(f, os.path.basename(file_path),
+                                          chunk_size_bytes, checksum_algo)
+    
+    def chunk_file_stream(self, stream, filename: str, chunk_size_bytes: int = 64 * 1024,
+                          checksum_algo: str = DEFAULT_CHECKSUM_ALGO) -> Tuple[str, List[FileSegment]]:
+        """
+        Chunk a binary stream (e.g. an uploaded file) into segments
+        The stream is consumed once, so no temporary copy on disk is needed
+        
+        Args:
+            stream: Readable binary file-like object
+            filename: Original filename to record in metadata
+            chunk_size_bytes: Size of each chunk (default 64KB)
+            checksum_algo: Per-chunk checksum algorithm (see CHECKSUM_ALGORITHMS)
+            
+        Returns:
+            Tuple of (file_id, list of FileSegments)
+        """
+        if checksum_algo not in CHECKSUM_ALGORITHMS:
+            raise ValueError(f"Unsupported checksum algorithm: {checksum_algo}")
+        checksum_func = CHECKSUM_ALGORITHMS[checksum_algo]
+        
+        original_filename = os.path.basename(filename)
+        
+        # Single pass: chunks are read ahead in the background while the file
+        # hash and per-chunk checksums are computed
+        file_hasher = hashlib.sha256()
+        chunks = []
+        for chunk_data in _prefetch_chunks(stream, chunk_size_bytes):
+            file_hasher.update(chunk_data)
+            chunks.append((chunk_data, checksum_func(chunk_data)))
+        
+        file_size = sum(len(chunk_data) for chunk_data, _ in chunks)
+        file_hash = file_hasher.hexdigest()
         file_id = file_hash[:16]  # Use first 16 chars of hash as file ID
-        original_filename = os.path.basename(file_path)
         
-        segments = []
-        chunk_number = 0
+        # One timestamp shared by the file and all of its segments
+        created_at = datetime.now()
         
-        with open(file_path, 'rb') as f:
-            while True:
-                chunk_data = f.read(chunk_size_bytes)
-                if not chunk_data:
-                    break
-                
-                segment_id = f"{file_id}_chunk_{chunk_number}"
-                checksum = hashlib.sha256(chunk_data).hexdigest()
-                
-                segment = FileSegment(
-                    segment_id=segment_id,
-                    file_hash=file_hash,
-                    chunk_number=chunk_number,
-                    data=chunk_data,
-                    size_bytes=len(chunk_data),
-                    checksum=checksum
-                )
-                
-                segments.append(segment)
-                chunk_number += 1
+        segments = [
+            FileSegment(
+                segment_id=f"{file_id}_chunk_{chunk_number}",
+                file_hash=file_hash,
+                chunk_number=chunk_number,
+                data=chunk_data,
+                size_bytes=len(chunk_data),
+                checksum=checksum,
+                checksum_algo=checksum_algo,
+                timestamp=created_at
+            )
+            for chunk_number, (chunk_data, checksum) in enumerate(chunks)
+        ]
         
         # Create metadata
         metadata = FileMetadata(
@@ -147,51 +312,58 @@ class VirtualStorage:
             file_hash=file_hash,
             total_size_bytes=file_size,
             chunk_size_bytes=chunk_size_bytes,
-            total_chunks=len(segments)
+            total_chunks=len(segments),
+            created_at=created_at,
+            checksum_algo=checksum_algo
         )
         
-        self.file_metadata[file_id] = metadata
+        with self._lock:
+            self.file_metadata[file_id] = metadata
         
         logger.info(f"[STORAGE {self.node_id}] File '{original_filename}' chunked into "
                    f"{len(segments)} segments (file_id: {file_id})")
         
         return file_id, segments
     
-    def store_segment(self, segment: FileSegment) -> bool:
+    def store_segment(self, segment: FileSegment, persist: bool = True) -> bool:
         """
         Store a file segment on this node
         
         Args:
             segment: FileSegment to store
+            persist: Save metadata if the segment's file is tracked on this node;
+                callers storing a whole file pass False and save once at the end
             
         Returns:
             True if successful
         """
-        # Check available space
-        if self.used_bytes + segment.size_bytes > self.capacity_bytes:
-            logger.error(f"[STORAGE {self.node_id}] Insufficient space for segment {segment.segment_id}")
-            return False
+        # Check available space, reserving it so concurrent stores cannot overcommit
+        with self._lock:
+            if self.used_bytes + segment.size_bytes > self.capacity_bytes:
+                logger.error(f"[STORAGE {self.node_id}] Insufficient space for segment {segment.segment_id}")
+                return False
+            self.used_bytes += segment.size_bytes
         
         # Write segment to disk
-        segment_path = os.path.join(self.storage_root, f"{segment.segment_id}.bin")
         try:
-            with open(segment_path, 'wb') as f:
-                f.write(segment.data)
+            file_id, chunk_number = _split_segment_id(segment.segment_id)
+            if file_id is not None:
+                # Held until the chunk is recorded, so a concurrent delete_file
+                # sees either none or all of this store
+                with self._get_pack_lock(file_id):
+                    replaced = self._append_to_pack(file_id, chunk_number, segment)
+                    meta = self._record_segment(segment, file_id)
+                if replaced:
+                    # The chunk's earlier copy was already counted
+                    with self._lock:
+                        self.used_bytes -= replaced
+            else:
+                self._write_at(self._flat_segment_path(segment.segment_id), segment.data, 0, truncate=True)
+                meta = self._record_segment(segment, None)
             
-            self.file_segments[segment.segment_id] = segment
-            self.used_bytes += segment.size_bytes
-            
-            # Update metadata
-            # Find metadata entry whose full file_hash matches this segment's file_hash
-            for fid, meta in self.file_metadata.items():
-                if meta.file_hash == segment.file_hash:
-                    meta.chunks[segment.chunk_number] = self.node_id
-                    break
-            # Persist metadata to disk
-            try:
+            # Persist outside the lock so concurrent stores do not queue behind the write
+            if meta is not None and persist:
                 self.save_metadata()
-            except Exception:
-                pass
             
             logger.info(f"[STORAGE {self.node_id}] Segment {segment.segment_id} stored "
                        f"({segment.size_bytes} bytes)")
@@ -199,45 +371,365 @@ class VirtualStorage:
             return True
         
         except Exception as e:
+            with self._lock:
+                self.used_bytes -= segment.size_bytes
             logger.error(f"[STORAGE {self.node_id}] Error storing segment: {e}")
             return False
     
-    def retrieve_segment(self, segment_id: str) -> Optional[FileSegment]:
+    def _record_segment(self, segment: FileSegment, file_id: Optional[str]) -> Optional[FileMetadata]:
+        """
+        Cache a stored segment and record its location in the metadata of its file
+        
+        Returns:
+            The file's metadata if it is tracked on this node, else None
+        """
+        with self._lock:
+            self.file_segments[segment.segment_id] = segment
+            
+            meta = self.file_metadata.get(file_id) if file_id is not None else None
+            if meta is None or meta.file_hash != segment.file_hash:
+                meta = next((m for m in self.file_metadata.values()
+                             if m.file_hash == segment.file_hash), None)
+            if meta is not None:
+                meta.chunks[segment.chunk_number] = self.node_id
+            return meta
+    
+    def _get_pack_lock(self, file_id: str) -> threading.Lock:
+        """
+        Lock serializing writes to a file's pack and index against its deletion
+        Taken before the storage lock, never while holding it
+        """
+        with self._lock:
+            return self._pack_locks.setdefault(file_id, threading.Lock())
+    
+    def _append_to_pack(self, file_id: str, chunk_number: int, segment: FileSegment) -> int:
+        """
+        Append a chunk to the file's pack on this node and record it in the pack index
+        All chunks of a file held by a node share one pack file instead of one
+        file (and inode) per chunk; the index keeps the chunk checksum alongside.
+        A chunk stored again is skipped if unchanged, or rewritten in its old
+        region if it fits. The caller holds the file's pack lock
+        
+        Returns:
+            Size of the copy of the chunk already in the pack (0 if there was none)
+        """
+        data = segment.data
+        length = len(data)
+        if self.direct_io:
+            length = -(-length // DIRECT_IO_ALIGNMENT) * DIRECT_IO_ALIGNMENT
+        
+        with self._lock:
+            index = self._get_pack_index(file_id)
+            existing = index.get(chunk_number)
+            if existing is not None and existing[1:] == (len(data), segment.checksum, segment.checksum_algo):
+                return existing[1]
+            if existing is not None and length <= existing[1]:
+                offset = existing[0]
+            else:
+                # Reserve a region at the tail of the pack
+                offset = self._pack_tails.get(file_id, 0)
+                self._pack_tails[file_id] = offset + length
+        
+        self._write_to_pack(file_id, data, offset)
+        
+        entry = {'chunk': chunk_number, 'offset': offset, 'size': len(data),
+                 'checksum': segment.checksum.hex(), 'algo': segment.checksum_algo}
+        self._get_open_pack(file_id)[2].write(json.dumps(entry) + "\n")
+        with self._lock:
+            index[chunk_number] = (offset, len(data), segment.checksum, segment.checksum_algo)
+        return existing[1] if existing is not None else 0
+    
+    def _get_open_pack(self, file_id: str) -> Tuple[int, bool, TextIO]:
+        """
+        Get the pack fd (and whether it was opened with O_DIRECT) and the index
+        file of a file, kept open across stores of its chunks
+        The caller holds the file's pack lock
+        """
+        with self._lock:
+            handles = self._open_packs.pop(file_id, None)
+            if handles is not None:
+                self._open_packs[file_id] = handles  # Now the most recently used
+                return handles
+        
+        flags = os.O_WRONLY | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+        direct = self.direct_io
+        fd = None
+        if direct:
+            try:
+                fd = os.open(self._pack_path(file_id), flags | os.O_DIRECT, 0o644)
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise
+                self._disable_direct_io()
+                direct = False
+        if fd is None:
+            fd = os.open(self._pack_path(file_id), flags, 0o644)
+        try:
+            # Line buffered: each index entry reaches the file in one write
+            index_file = open(self._pack_index_path(file_id), 'a', buffering=1)
+        except OSError:
+            os.close(fd)
+            raise
+        
+        handles = (fd, direct, index_file)
+        with self._lock:
+            self._open_packs[file_id] = handles
+            # Close the least recently used packs that no store is writing
+            for other in list(self._open_packs):
+                if len(self._open_packs) <= OPEN_PACKS_MAX:
+                    break
+                if other == file_id:
+                    continue
+                pack_lock = self._pack_locks[other]
+                if pack_lock.acquire(blocking=False):
+                    try:
+                        self._close_open_pack(other)
+                    finally:
+                        pack_lock.release()
+        return handles
+    
+    def _close_open_pack(self, file_id: str):
+        """Close the open pack and index of a file, if any"""
+        with self._lock:
+            handles = self._open_packs.pop(file_id, None)
+        if handles is not None:
+            os.close(handles[0])
+            handles[2].close()
+    
+    def _write_to_pack(self, file_id: str, data: bytes, offset: int):
+        """Write data at an offset of a file's pack through its open fd; the caller holds the pack lock"""
+        fd, direct, _ = self._get_open_pack(file_id)
+        if direct and data:
+            try:
+                with _aligned_buffer(data) as buf:
+                    _pwrite(fd, buf, offset)
+                return
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise
+                self._disable_direct_io()
+                self._close_open_pack(file_id)
+                fd = self._get_open_pack(file_id)[0]
+        _pwrite(fd, data, offset)
+    
+    def _disable_direct_io(self):
+        """Fall back to buffered I/O after the filesystem rejected O_DIRECT"""
+        if self.direct_io:
+            logger.warning(f"[STORAGE {self.node_id}] O_DIRECT not supported by the filesystem, "
+                          f"using buffered I/O")
+        self.direct_io = False
+    
+    def _write_at(self, path: str, data: bytes, offset: int, truncate: bool = False):
+        """
+        Write data at an offset of a file, with O_DIRECT when direct I/O is enabled
+        
+        Args:
+            path: File to write (created if missing)
+            data: Bytes to write
+            offset: Byte offset to write at (must be block aligned for direct I/O)
+            truncate: Truncate the file to offset + len(data) after writing
+        """
+        flags = os.O_WRONLY | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+        
+        if self.direct_io and data:
+            try:
+                fd = os.open(path, flags | os.O_DIRECT, 0o644)
+                try:
+                    with _aligned_buffer(data) as buf:
+                        _pwrite(fd, buf, offset)
+                    if truncate:
+                        os.ftruncate(fd, offset + len(data))
+                finally:
+                    os.close(fd)
+                return
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise
+                self._disable_direct_io()
+        
+        fd = os.open(path, flags, 0o644)
+        try:
+            _pwrite(fd, data, offset)
+            if truncate:
+                os.ftruncate(fd, offset + len(data))
+        finally:
+            os.close(fd)
+    
+    def retrieve_segment(self, segment_id: str, verify: bool = False) -> Optional[FileSegment]:
         """
         Retrieve a file segment from storage
         
         Args:
             segment_id: ID of segment to retrieve
+            verify: Read the stored copy back from disk (bypassing the segment
+                cache) and reject it if its checksum does not match
             
         Returns:
             FileSegment if found, None otherwise
         """
-        if segment_id in self.file_segments:
-            return self.file_segments[segment_id]
+        if verify:
+            segment = self._read_stored_segment(segment_id)
+            if segment is None:
+                return None
+            if segment.calculate_checksum() != segment.checksum:
+                logger.error(f"[STORAGE {self.node_id}] Checksum mismatch for segment {segment_id}")
+                return None
+            # The verified disk copy replaces whatever was cached
+            self.file_segments[segment_id] = segment
+            return segment
+        
+        segment = self.file_segments.get(segment_id)
+        
+        if segment is None:
+            # Try to load from disk: the file's pack, else a flat segment file
+            file_id, chunk_number = _split_segment_id(segment_id)
+            if file_id is not None:
+                index = self._get_pack_index(file_id)
+                if chunk_number in index:
+                    segment = self._load_packed_segment(segment_id, file_id, chunk_number, index[chunk_number])
+            if segment is None:
+                segment = self._load_segment(segment_id, self._flat_segment_path(segment_id))
+        return segment
+    
+    def _read_stored_segment(self, segment_id: str) -> Optional[FileSegment]:
+        """
+        Read a segment straight from disk without consulting or filling the cache
+        Packed chunks carry the checksum recorded in the pack index; flat segment
+        files take the checksum of their cached copy when there is one
+        """
+        file_id, chunk_number = _split_segment_id(segment_id)
+        if file_id is not None:
+            index = self._get_pack_index(file_id)
+            if chunk_number in index:
+                return self._load_packed_segment(segment_id, file_id, chunk_number,
+                                                 index[chunk_number], cache=False)
+        
+        segment = self._load_segment(segment_id, self._flat_segment_path(segment_id), cache=False)
+        cached = self.file_segments.get(segment_id)
+        if segment is not None and cached is not None:
+            segment.checksum, segment.checksum_algo = cached.checksum, cached.checksum_algo
+        return segment
+    
+    def verify_segment(self, segment_id: str) -> bool:
+        """
+        Verify the integrity of a stored segment against its recorded checksum
+        The copy on disk is checked, not the cached one
+        
+        Args:
+            segment_id: ID of segment to verify
+            
+        Returns:
+            True if the segment exists and is intact
+        """
+        return self.retrieve_segment(segment_id, verify=True) is not None
+    
+    def _flat_segment_path(self, segment_id: str) -> str:
+        """On-disk path of a segment stored as its own file"""
+        return os.path.join(self.storage_root, f"{segment_id}.bin")
+    
+    def _pack_path(self, file_id: str) -> str:
+        """On-disk path of the pack holding this node's chunks of a file"""
+        return os.path.join(self.storage_root, f"{file_id}.pack")
+    
+    def _pack_index_path(self, file_id: str) -> str:
+        """On-disk path of the index of a file's pack (one JSON entry per line)"""
+        return os.path.join(self.storage_root, f"{file_id}.idx")
+    
+    def _get_pack_index(self, file_id: str) -> Dict[int, Tuple[int, int, bytes, str]]:
+        """
+        Get the pack index of a file, loading it from disk on first use
         
-        # Try to load from disk
-        segment_path = os.path.join(self.storage_root, f"{segment_id}.bin")
-        if os.path.exists(segment_path):
+        Returns:
+            Dict of {chunk_number: (offset, size, checksum, checksum_algo)};
+            empty if the node holds no packed chunks of the file
+        """
+        index = self._pack_index.get(file_id)
+        if index is not None:
+            return index
+        
+        with self._lock:
+            index = self._pack_index.get(file_id)
+            if index is not None:
+                return index
+            
+            index = {}
+            tail = 0
             try:
-                with open(segment_path, 'rb') as f:
-                    data = f.read()
-                
-                segment = FileSegment(
-                    segment_id=segment_id,
-                    file_hash="",
-                    chunk_number=0,
-                    data=data,
-                    size_bytes=len(data),
-                    checksum=hashlib.sha256(data).hexdigest()
-                )
-                
-                self.file_segments[segment_id] = segment
-                return segment
+                with open(self._pack_index_path(file_id), 'r') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue  # Torn write at the end of the index
+                        index[entry['chunk']] = (entry['offset'], entry['size'],
+                                                 bytes.fromhex(entry['checksum']), entry['algo'])
+                        tail = max(tail, entry['offset'] + entry['size'])
+            except FileNotFoundError:
+                pass
             
-            except Exception as e:
-                logger.error(f"[STORAGE {self.node_id}] Error loading segment: {e}")
+            if tail % DIRECT_IO_ALIGNMENT:
+                tail += DIRECT_IO_ALIGNMENT - tail % DIRECT_IO_ALIGNMENT
+            self._pack_tails[file_id] = tail
+            self._pack_index[file_id] = index
+            # Chunks stored before a restart count against capacity once known
+            self.used_bytes += sum(entry[1] for entry in index.values())
+            return index
+    
+    def _load_packed_segment(self, segment_id: str, file_id: str, chunk_number: int,
+                             entry: Tuple[int, int, bytes, str], cache: bool = True) -> Optional[FileSegment]:
+        """
+        Load a chunk from the file's pack (into the segment cache unless cache=False)
+        The checksum recorded at store time is reused rather than recomputed
+        """
+        offset, size, checksum, checksum_algo = entry
+        try:
+            with open(self._pack_path(file_id), 'rb') as f:
+                f.seek(offset)
+                data = f.read(size)
+        except Exception as e:
+            logger.error(f"[STORAGE {self.node_id}] Error loading segment: {e}")
+            return None
+        
+        metadata = self.file_metadata.get(file_id)
+        segment = FileSegment(
+            segment_id=segment_id,
+            file_hash=metadata.file_hash if metadata else "",
+            chunk_number=chunk_number,
+            data=data,
+            size_bytes=len(data),
+            checksum=checksum,
+            checksum_algo=checksum_algo
+        )
         
-        return None
+        if cache:
+            self.file_segments[segment_id] = segment
+        return segment
+    
+    def _load_segment(self, segment_id: str, segment_path: str, cache: bool = True) -> Optional[FileSegment]:
+        """Load a segment file from disk (into the segment cache unless cache=False)"""
+        try:
+            with open(segment_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"[STORAGE {self.node_id}] Error loading segment: {e}")
+            return None
+        
+        # Flat segment files have no recorded checksum
+        _, chunk_number = _split_segment_id(segment_id)
+        segment = FileSegment(
+            segment_id=segment_id,
+            file_hash="",
+            chunk_number=chunk_number,
+            data=data,
+            size_bytes=len(data),
+            checksum=hashlib.sha256(data).digest()
+        )
+        
+        if cache:
+            self.file_segments[segment_id] = segment
+        return segment
     
     def reconstruct_file(self, file_id: str, output_path: str, 
                         get_segment_callback=None) -> bool:
@@ -265,23 +757,25 @@ class VirtualStorage:
                 os.makedirs(out_dir, exist_ok=True)
 
             logger.info(f"[STORAGE {self.node_id}] Reconstructing file {file_id} to {output_path}")
-            with open(output_path, 'wb') as output_file:
-                for chunk_num in range(metadata.total_chunks):
-                    segment_id = f"{file_id}_chunk_{chunk_num}"
-
-                    # Try to get from local storage first
-                    segment = self.retrieve_segment(segment_id)
 
-                    # If not local and callback provided, fetch from remote
-                    if segment is None and get_segment_callback:
-                        logger.debug(f"[STORAGE {self.node_id}] Fetching segment {segment_id} from remote")
-                        segment = get_segment_callback(segment_id)
+            # The pack index tells which chunks are on local disk, so remote
+            # chunks do not cost a failed path lookup each
+            packed = self._get_pack_index(file_id)
 
-                    if segment is None:
-                        logger.error(f"[STORAGE {self.node_id}] Segment not found during reconstruction: {segment_id}")
-                        return False
+            # Fast path: every chunk is in this node's pack, so the file is
+            # copied pack -> output in the kernel without materializing chunks
+            if (sys.platform == 'linux' and packed
+                    and all(n in packed for n in range(metadata.total_chunks))):
+                self._reconstruct_from_pack(file_id, metadata, packed, output_path)
+            elif not self._reconstruct_concurrently(file_id, metadata, packed, output_path,
+                                                    get_segment_callback):
+                return False
 
-                    output_file.write(segment.data)
+            # Chunks are not verified one by one; the whole file is checked
+            # once against its content hash instead
+            if self._calculate_file_hash(output_path) != metadata.file_hash:
+                logger.error(f"[STORAGE {self.node_id}] Reconstructed file {file_id} does not match its hash")
+                return False
 
             logger.info(f"[STORAGE {self.node_id}] File reconstructed: {output_path} "
                        f"({metadata.total_size_bytes} bytes)")
@@ -290,7 +784,206 @@ class VirtualStorage:
         except Exception as e:
             logger.error(f"[STORAGE {self.node_id}] Error reconstructing file: {e}")
             return False
-    
+
+    def _reconstruct_from_pack(self, file_id: str, metadata: FileMetadata,
+                               packed: Dict[int, Tuple[int, int, bytes, str]], output_path: str):
+        """Copy every chunk of a fully local file from its pack into output_path with os.sendfile"""
+        pack_fd = os.open(self._pack_path(file_id), os.O_RDONLY)
+        try:
+            out_fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                for chunk_num in range(metadata.total_chunks):
+                    offset, size = packed[chunk_num][:2]
+                    while size:
+                        sent = os.sendfile(out_fd, pack_fd, offset, size)
+                        if sent == 0:
+                            raise IOError(f"Pack of {file_id} ended inside chunk {chunk_num}")
+                        offset += sent
+                        size -= sent
+            finally:
+                os.close(out_fd)
+        finally:
+            os.close(pack_fd)
+
+    def _reconstruct_concurrently(self, file_id: str, metadata: FileMetadata,
+                                  packed: Dict[int, Tuple[int, int, bytes, str]], output_path: str,
+                                  get_segment_callback=None) -> bool:
+        """
+        Fetch chunks from local storage or remote nodes and write them into output_path
+        Every chunk has a fixed offset, so chunks are fetched and written
+        concurrently into the preallocated output file
+
+        Returns:
+            True if every chunk was written
+        """
+        def write_chunk(chunk_num: int) -> bool:
+            segment_id = f"{file_id}_chunk_{chunk_num}"
+
+            # Try to get from local storage first
+            segment = self.file_segments.get(segment_id)
+            if segment is None:
+                if chunk_num in packed:
+                    segment = self._load_packed_segment(segment_id, file_id, chunk_num, packed[chunk_num])
+                elif not packed:
+                    # No pack for this file here - may be in the legacy flat layout
+                    segment = self.retrieve_segment(segment_id)
+
+            # If not local and callback provided, fetch from remote
+            if segment is None and get_segment_callback:
+                logger.debug(f"[STORAGE {self.node_id}] Fetching segment {segment_id} from remote")
+                segment = get_segment_callback(segment_id)
+
+            if segment is None:
+                logger.error(f"[STORAGE {self.node_id}] Segment not found during reconstruction: {segment_id}")
+                return False
+
+            if direct:
+                with _aligned_buffer(segment.data) as buf:
+                    _pwrite(fd, buf, metadata.chunk_offset(chunk_num))
+            else:
+                _pwrite(fd, segment.data, metadata.chunk_offset(chunk_num))
+            return True
+
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+        direct = self.direct_io and metadata.chunk_size_bytes % DIRECT_IO_ALIGNMENT == 0
+        fd = None
+        if direct:
+            try:
+                fd = os.open(output_path, flags | os.O_DIRECT, 0o644)
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise
+                direct = False
+        if fd is None:
+            fd = os.open(output_path, flags, 0o644)
+        try:
+            os.ftruncate(fd, metadata.total_size_bytes)
+            with ThreadPoolExecutor(max_workers=RECONSTRUCT_WORKERS) as pool:
+                futures = [pool.submit(write_chunk, n) for n in range(metadata.total_chunks)]
+                for future in as_completed(futures):
+                    if not future.result():
+                        for pending in futures:
+                            pending.cancel()
+                        return False
+            if direct:
+                # Trim the padding written after the last chunk
+                os.ftruncate(fd, metadata.total_size_bytes)
+        finally:
+            os.close(fd)
+
+        return True
+
+    def verify_file(self, file_id: str, get_segment_callback=None) -> bool:
+        """
+        Verify the integrity of every chunk of a file
+        Local chunks are read back from disk, and any cached copy (which is what
+        retrieval serves) is checked as well; chunks are hashed with their own
+        checksum algorithm and the file hash is accumulated in the same pass
+
+        Args:
+            file_id: File to verify
+            get_segment_callback: Callback function to retrieve segments from other nodes
+
+        Returns:
+            True if every chunk and the whole file match their checksums
+        """
+        if file_id not in self.file_metadata:
+            logger.error(f"[STORAGE {self.node_id}] File metadata not found: {file_id}")
+            return False
+
+        metadata = self.file_metadata[file_id]
+        file_hash = hashlib.sha256()
+        corrupted = []
+
+        for chunk_num in range(metadata.total_chunks):
+            segment_id = f"{file_id}_chunk_{chunk_num}"
+
+            segment = self._read_stored_segment(segment_id)
+            cached = self.file_segments.get(segment_id)
+            if segment is None:
+                segment = cached
+                cached = None
+            if segment is None and get_segment_callback:
+                segment = get_segment_callback(segment_id)
+
+            if segment is None:
+                logger.error(f"[STORAGE {self.node_id}] Segment not found during verification: {segment_id}")
+                return False
+
+            if segment.calculate_checksum() != segment.checksum:
+                corrupted.append(segment_id)
+            elif cached is not None and cached.calculate_checksum() != cached.checksum:
+                corrupted.append(segment_id)
+            file_hash.update(segment.data)
+
+        if corrupted:
+            logger.error(f"[STORAGE {self.node_id}] File {file_id} has {len(corrupted)} corrupted "
+                        f"segments: {', '.join(corrupted)}")
+            return False
+
+        if file_hash.hexdigest() != metadata.file_hash:
+            logger.error(f"[STORAGE {self.node_id}] File {file_id} hash mismatch")
+            return False
+
+        logger.info(f"[STORAGE {self.node_id}] File {file_id} verified "
+                   f"({metadata.total_chunks} segments)")
+        return True
+
+    def verify_all(self) -> List[str]:
+        """
+        Integrity sweep over every segment stored on this node's disk
+        Every pack index in storage_root is walked and each recorded region is
+        read back from its pack and compared with the checksum taken at store
+        time; cached flat segments are re-read from their files. Reads and
+        checksums run in a thread pool (both release the GIL)
+
+        Returns:
+            List of IDs of corrupted segments (empty if all are intact)
+        """
+        checks = []
+        for index_path in glob.glob(os.path.join(self.storage_root, "*.idx")):
+            file_id = os.path.basename(index_path)[:-len(".idx")]
+            for chunk_number, entry in sorted(self._get_pack_index(file_id).items()):
+                checks.append((f"{file_id}_chunk_{chunk_number}", file_id, entry))
+        
+        # Flat segment files keep their checksum only in the segment cache
+        flat = [seg for seg_id, seg in list(self.file_segments.items())
+                if _split_segment_id(seg_id)[0] is None]
+        
+        def check_packed(item) -> bool:
+            _, file_id, (offset, size, checksum, algo) = item
+            try:
+                fd = os.open(self._pack_path(file_id), os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+                try:
+                    data = _pread(fd, size, offset)
+                finally:
+                    os.close(fd)
+            except OSError:
+                return False
+            return len(data) == size and CHECKSUM_ALGORITHMS[algo](data) == checksum
+        
+        def check_flat(segment: FileSegment) -> bool:
+            try:
+                with open(self._flat_segment_path(segment.segment_id), 'rb') as f:
+                    data = f.read()
+            except OSError:
+                return False
+            return CHECKSUM_ALGORITHMS[segment.checksum_algo](data) == segment.checksum
+        
+        with ThreadPoolExecutor() as pool:
+            packed_ok = list(pool.map(check_packed, checks))
+            flat_ok = list(pool.map(check_flat, flat))
+        
+        corrupted = [item[0] for item, ok in zip(checks, packed_ok) if not ok]
+        corrupted += [seg.segment_id for seg, ok in zip(flat, flat_ok) if not ok]
+        total = len(checks) + len(flat)
+        if corrupted:
+            logger.error(f"[STORAGE {self.node_id}] Integrity sweep found {len(corrupted)} corrupted "
+                        f"segments: {', '.join(corrupted)}")
+        else:
+            logger.info(f"[STORAGE {self.node_id}] Integrity sweep passed ({total} segments)")
+        return corrupted
+
     def get_used_space_gb(self) -> float:
         """Get used storage space in GB"""
         return self.used_bytes / (1024 * 1024 * 1024)
@@ -314,21 +1007,30 @@ class VirtualStorage:
     
     def _calculate_file_hash(self, file_path: str) -> str:
         """Calculate SHA256 hash of file"""
-        sha256_hash = hashlib.sha256()
         with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
+            if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+                return hashlib.file_digest(f, 'sha256').hexdigest()
+            sha256_hash = hashlib.sha256()
+            for byte_block in iter(lambda: f.read(1024 * 1024), b""):
                 sha256_hash.update(byte_block)
         return sha256_hash.hexdigest()
     
     def save_metadata(self):
         """Save metadata to disk for persistence"""
         try:
-            metadata_dict = {}
-            for file_id, metadata in self.file_metadata.items():
-                metadata_dict[file_id] = metadata.to_dict()
-            
-            with open(self.metadata_file, 'w') as f:
-                json.dump(metadata_dict, f, indent=2)
+            # Snapshot under the storage lock, write under the save lock only:
+            # stores proceed during the write, and saves land in snapshot order
+            with self._save_lock:
+                with self._lock:
+                    metadata_dict = {}
+                    for file_id, metadata in self.file_metadata.items():
+                        metadata_dict[file_id] = metadata.to_dict()
+                
+                # Write-then-rename so readers never see a half-written file
+                tmp_path = self.metadata_file + ".tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(metadata_dict, f, indent=2)
+                os.replace(tmp_path, self.metadata_file)
             
             logger.info(f"[STORAGE {self.node_id}] Metadata saved")
         except Exception as e:
@@ -350,7 +1052,8 @@ class VirtualStorage:
                         chunk_size_bytes=meta_data['chunk_size_bytes'],
                         total_chunks=meta_data['total_chunks'],
                         chunks=meta_data.get('chunks', {}),
-                        replicas=meta_data.get('replicas', 1)
+                        replicas=meta_data.get('replicas', 1),
+                        checksum_algo=meta_data.get('checksum_algo', 'sha256')
                     )
                     self.file_metadata[file_id] = metadata
                 
@@ -359,14 +1062,101 @@ class VirtualStorage:
             except Exception as e:
                 logger.error(f"[STORAGE {self.node_id}] Error loading metadata: {e}")
     
+    def snapshot_metadata(self) -> Dict[str, FileMetadata]:
+        """Return a shallow copy of the file metadata dict, taken under the lock"""
+        with self._lock:
+            return dict(self.file_metadata)
+    
+    def restore_metadata(self, file_id: str, previous: Optional[FileMetadata]):
+        """Put back a file's metadata entry as it was before chunking (remove it if there was none)"""
+        with self._lock:
+            if previous is None:
+                self.file_metadata.pop(file_id, None)
+            else:
+                self.file_metadata[file_id] = previous
+    
+    def rename_file(self, file_id: str, filename: str) -> bool:
+        """
+        Change the original filename recorded for a file and persist it
+        
+        Args:
+            file_id: File ID to rename
+            filename: New original filename
+            
+        Returns:
+            True if the file's metadata is held by this node
+        """
+        with self._lock:
+            metadata = self.file_metadata.get(file_id)
+            if metadata is None:
+                return False
+            metadata.original_filename = os.path.basename(filename)
+        self.save_metadata()
+        return True
+    
+    def delete_file(self, file_id: str) -> int:
+        """
+        Delete a file's metadata and all of its segments held by this node
+        
+        Args:
+            file_id: File ID to delete
+            
+        Returns:
+            Number of entries removed (segments plus the metadata entry)
+        """
+        prefix = f"{file_id}_chunk_"
+        # The pack lock keeps in-flight stores of this file from writing the
+        # pack or index between the removal below and the dict cleanup
+        with self._get_pack_lock(file_id):
+            with self._lock:
+                # Rebuild the segment dict in one pass instead of deleting key by key
+                kept = {}
+                removed = []
+                for segment_id, segment in self.file_segments.items():
+                    if segment_id.startswith(prefix):
+                        removed.append(segment)
+                    else:
+                        kept[segment_id] = segment
+                self.file_segments = kept
+                
+                had_metadata = self.file_metadata.pop(file_id, None) is not None
+                index = self._pack_index.pop(file_id, None)
+                if index:
+                    self.used_bytes -= sum(entry[1] for entry in index.values())
+                self._pack_tails.pop(file_id, None)
+            
+            self._close_open_pack(file_id)
+            # File removal runs outside the storage lock so other files' stores proceed
+            for path in (self._pack_path(file_id), self._pack_index_path(file_id)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.error(f"[STORAGE {self.node_id}] Error removing {path}: {e}")
+        
+        # save_metadata takes _save_lock before _lock, so it must run after releasing _lock
+        if had_metadata:
+            self.save_metadata()
+        
+        if removed or had_metadata:
+            logger.info(f"[STORAGE {self.node_id}] File {file_id} deleted "
+                       f"({len(removed)} segments)")
+        return len(removed) + int(had_metadata)
+    
     def clear_storage(self):
         """Clear all storage for the node (CAUTION - destructive)"""
         try:
-            shutil.rmtree(self.storage_root)
-            os.makedirs(self.storage_root, exist_ok=True)
-            self.file_segments.clear()
-            self.file_metadata.clear()
-            self.used_bytes = 0
+            with self._lock:
+                for file_id in list(self._open_packs):
+                    self._close_open_pack(file_id)
+                shutil.rmtree(self.storage_root)
+                os.makedirs(self.storage_root, exist_ok=True)
+                self.file_segments.clear()
+                self.file_metadata.clear()
+                self._pack_index.clear()
+                self._pack_tails.clear()
+                self.used_bytes = 0
             logger.info(f"[STORAGE {self.node_id}] Storage cleared")
         except Exception as e:
             logger.error(f"[STORAGE {self.node_id}] Error clearing storage: {e}")
@@ -62,6 +62,11 @@ class SystemValidator:
         self.test("File chunking", self.test_file_chunking)
         self.test("Segment storage", self.test_segment_storage)
         self.test("Metadata persistence", self.test_metadata_persistence)
+        self.test("File verification", self.test_file_verification)
+        self.test("Integrity sweep", self.test_integrity_sweep)
+        self.test("Pack storage round trip", self.test_pack_round_trip)
+        self.test("Concurrent save and delete", self.test_concurrent_save_delete)
+        self.test("File deletion cleanup", self.test_delete_cleanup)
         
         # Test authentication
         self.test("User registration", self.test_user_registration)
@@ -172,6 +177,172 @@ class SystemValidator:
         # Check metadata file exists
         assert os.path.exists(storage.metadata_file)
     
+    def test_file_verification(self):
+        """Test chunk and file integrity verification"""
+        from storage.virtual_storage import VirtualStorage
+        import tempfile
+        
+        with tempfile.NamedTemporaryFile(delete=False, mode='wb') as f:
+            f.write(os.urandom(200 * 1024))
+            temp_path = f.name
+        
+        try:
+            storage = VirtualStorage("test_node")
+            file_id, segments = storage.chunk_file(temp_path, chunk_size_bytes=64*1024)
+            for segment in segments:
+                storage.store_segment(segment)
+            
+            assert storage.verify_file(file_id) is True
+            
+            # Corrupt one chunk in memory
+            segments[1].data = b"X" * segments[1].size_bytes
+            assert storage.verify_file(file_id) is False
+        finally:
+            os.unlink(temp_path)
+    
+    def test_integrity_sweep(self):
+        """Test that the integrity sweep detects corruption of packed chunks on disk"""
+        from storage.virtual_storage import VirtualStorage
+        import tempfile
+        
+        with tempfile.NamedTemporaryFile(delete=False, mode='wb') as f:
+            f.write(os.urandom(200 * 1024))
+            temp_path = f.name
+        
+        try:
+            storage = VirtualStorage("test_sweep_node")
+            file_id, segments = storage.chunk_file(temp_path, chunk_size_bytes=64*1024)
+            for segment in segments:
+                storage.store_segment(segment)
+            
+            assert storage.verify_all() == []
+            
+            # Flip a byte of chunk 2 in the pack on disk
+            offset = storage._get_pack_index(file_id)[2][0]
+            with open(storage._pack_path(file_id), 'r+b') as f:
+                f.seek(offset)
+                byte = f.read(1)
+                f.seek(offset)
+                f.write(bytes([byte[0] ^ 0xFF]))
+            
+            corrupted_id = f"{file_id}_chunk_2"
+            assert storage.verify_all() == [corrupted_id]
+            # A freshly started node has no cached segments but still sees it
+            assert VirtualStorage("test_sweep_node").verify_all() == [corrupted_id]
+            # Per-segment and per-file checks read the disk copy, not the cache
+            assert storage.verify_segment(corrupted_id) is False
+            assert storage.verify_segment(f"{file_id}_chunk_1") is True
+            assert storage.verify_file(file_id) is False
+            storage.clear_storage()
+        finally:
+            os.unlink(temp_path)
+    
+    def test_pack_round_trip(self):
+        """Test that packed files reconstruct byte-for-byte after a restart, with and without O_DIRECT"""
+        from storage.virtual_storage import VirtualStorage
+        import tempfile
+        
+        data = os.urandom(200 * 1024 + 123)  # Last chunk is not block aligned
+        with tempfile.NamedTemporaryFile(delete=False, mode='wb') as f:
+            f.write(data)
+            temp_path = f.name
+        out_path = temp_path + ".out"
+        
+        try:
+            for direct_io in (False, True):
+                owner = VirtualStorage("test_pack_owner", direct_io=direct_io)
+                peer = VirtualStorage("test_pack_peer", direct_io=direct_io)
+                owner.clear_storage()
+                peer.clear_storage()
+                
+                # All chunks on the owner: the whole-pack copy path
+                file_id, segments = owner.chunk_file(temp_path, chunk_size_bytes=64*1024)
+                for segment in segments:
+                    assert owner.store_segment(segment)
+                
+                restarted = VirtualStorage("test_pack_owner", direct_io=direct_io)
+                assert restarted.reconstruct_file(file_id, out_path)
+                with open(out_path, 'rb') as f:
+                    assert f.read() == data
+                
+                # Chunks split across two nodes: the per-chunk path
+                owner.clear_storage()
+                file_id, segments = owner.chunk_file(temp_path, chunk_size_bytes=64*1024)
+                for i, segment in enumerate(segments):
+                    assert (owner if i % 2 == 0 else peer).store_segment(segment)
+                
+                restarted = VirtualStorage("test_pack_owner", direct_io=direct_io)
+                restarted_peer = VirtualStorage("test_pack_peer", direct_io=direct_io)
+                assert restarted.reconstruct_file(file_id, out_path,
+                                                  get_segment_callback=restarted_peer.retrieve_segment)
+                with open(out_path, 'rb') as f:
+                    assert f.read() == data
+                
+                owner.clear_storage()
+                peer.clear_storage()
+        finally:
+            os.unlink(temp_path)
+            if os.path.exists(out_path):
+                os.unlink(out_path)
+    
+    def test_concurrent_save_delete(self):
+        """Test that metadata saves and file deletes running together do not deadlock"""
+        from storage.virtual_storage import VirtualStorage
+        import io
+        import threading
+        
+        storage = VirtualStorage("test_lock_node")
+        storage.clear_storage()
+        file_ids = []
+        for i in range(20):
+            file_id, segments = storage.chunk_file_stream(io.BytesIO(os.urandom(4096)), f"file{i}.bin")
+            for segment in segments:
+                storage.store_segment(segment, persist=False)
+            file_ids.append(file_id)
+        
+        def save():
+            for _ in range(50):
+                storage.save_metadata()
+        
+        def delete():
+            for file_id in file_ids:
+                storage.delete_file(file_id)
+        
+        threads = [threading.Thread(target=save, daemon=True) for _ in range(2)]
+        threads.append(threading.Thread(target=delete, daemon=True))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        
+        assert not any(thread.is_alive() for thread in threads), "save/delete deadlocked"
+        assert storage.file_metadata == {}
+        storage.clear_storage()
+    
+    def test_delete_cleanup(self):
+        """Test that deleting a file removes its pack, index, metadata and space accounting"""
+        from storage.virtual_storage import VirtualStorage
+        import io
+        
+        storage = VirtualStorage("test_delete_node")
+        storage.clear_storage()
+        file_id, segments = storage.chunk_file_stream(io.BytesIO(os.urandom(200 * 1024)), "doomed.bin")
+        for segment in segments:
+            assert storage.store_segment(segment)
+        assert os.path.exists(storage._pack_path(file_id))
+        assert os.path.exists(storage._pack_index_path(file_id))
+        assert storage.used_bytes == 200 * 1024
+        
+        assert storage.delete_file(file_id) == len(segments) + 1
+        
+        assert not os.path.exists(storage._pack_path(file_id))
+        assert not os.path.exists(storage._pack_index_path(file_id))
+        assert file_id not in storage.file_metadata
+        assert file_id not in VirtualStorage("test_delete_node").file_metadata
+        assert storage.used_bytes == 0
+        assert storage._get_pack_index(file_id) == {}
+        storage.clear_storage()
+    
     def test_user_registration(self):
         """Test user registration"""
         from auth.authentication import AuthenticationManager
@@ -0,0 +1,78 @@
+"""
+Per-client rate limiting for the P2P web UI
+In-memory token buckets keyed by endpoint and client address
+"""
+
+import math
+import threading
+import time
+from functools import wraps
+from typing import Dict, Tuple
+
+from flask import jsonify, request
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Buckets kept before idle (full) ones are purged
+MAX_BUCKETS = 10000
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """Parse a rate like '5/minute' into (requests, period_seconds)"""
+    count, _, period = rate.partition('/')
+    if period not in PERIODS:
+        raise ValueError(f"Unsupported rate period: {rate}")
+    return int(count), PERIODS[period]
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter.
+
+    Each (endpoint, client) pair gets a bucket holding up to `count` tokens
+    that refills over the period; a request without a token is answered
+    429 before the wrapped handler runs.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _take(self, key: Tuple[str, str], count: int, period: int) -> float:
+        """Consume a token for key; returns 0 if allowed, else seconds until one is available"""
+        rate = count / period
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (float(count), now))
+            tokens = min(float(count), tokens + (now - last) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                if len(self._buckets) > MAX_BUCKETS:
+                    self._purge(now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+    def _purge(self, now: float):
+        """Drop buckets that have been idle long enough to refill"""
+        idle = [key for key, (_, last) in self._buckets.items() if now - last > 86400]
+        for key in idle:
+            del self._buckets[key]
+
+    def limit(self, rate: str):
+        """Decorator limiting a view to `rate` requests per client address"""
+        count, period = parse_rate(rate)
+
+        def decorator(f):
+            @wraps(f)
+            def limited(*args, **kwargs):
+                key = (f.__name__, request.remote_addr or 'unknown')
+                retry_after = self._take(key, count, period)
+                if retry_after:
+                    response = jsonify({'error': 'Too many requests'})
+                    response.status_code = 429
+                    response.headers['Retry-After'] = str(math.ceil(retry_after))
+                    return response
+                return f(*args, **kwargs)
+            return limited
+        return decorator
@@ -0,0 +1,115 @@
+"""
+Server-side session storage for the P2P web UI
+Keeps session state in process memory keyed by an opaque session id cookie
+"""
+
+import secrets
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, Tuple
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dict that tracks modifications and carries its session id"""
+
+    def __init__(self, initial=None, sid: str = None, new: bool = False):
+        def on_update(session):
+            session.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.replaced_sid = None
+
+    def regenerate(self):
+        """Move the session to a fresh id (call when the user's privileges change, e.g. login)"""
+        if self.replaced_sid is None and not self.new:
+            self.replaced_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+
+class MemorySessionInterface(SessionInterface):
+    """
+    Session interface backed by an in-memory dictionary.
+
+    The cookie only carries a random session id, so requests do not
+    deserialize or re-sign a cookie payload. Entries expire after
+    the app's PERMANENT_SESSION_LIFETIME. Requests that only read the
+    session do not rewrite it or send a Set-Cookie header.
+
+    Sessions live only in this process: a restart logs every user out, and
+    multiple worker processes do not share sessions.
+    """
+
+    def __init__(self):
+        self._store: Dict[str, Tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+
+    def _lifetime_seconds(self, app) -> float:
+        lifetime = app.permanent_session_lifetime
+        if isinstance(lifetime, timedelta):
+            return lifetime.total_seconds()
+        return float(lifetime)
+
+    def _purge_expired(self, now: float):
+        expired = [sid for sid, (expires, _) in self._store.items() if expires <= now]
+        for sid in expired:
+            del self._store[sid]
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            now = time.monotonic()
+            with self._lock:
+                entry = self._store.get(sid)
+                if entry is not None and entry[0] > now:
+                    return ServerSideSession(dict(entry[1]), sid=sid)
+                self._store.pop(sid, None)
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        # Responses depend on who is logged in
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified:
+                with self._lock:
+                    self._store.pop(session.sid, None)
+                    if session.replaced_sid:
+                        self._store.pop(session.replaced_sid, None)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        # Unchanged sessions need neither a store write nor a Set-Cookie header
+        if not self.should_set_cookie(app, session):
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            if session.new:
+                self._purge_expired(now)
+            if session.replaced_sid:
+                self._store.pop(session.replaced_sid, None)
+            self._store[session.sid] = (now + self._lifetime_seconds(app), dict(session))
+
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
@@ -0,0 +1,534 @@
+// Concurrent GETs of the same URL share one request; each caller gets its own clone
+const inflightRequests = new Map();
+function dedupFetch(url, opts) {
+    if (!inflightRequests.has(url)) {
+        const p = fetch(url, opts).finally(() => inflightRequests.delete(url));
+        inflightRequests.set(url, p);
+    }
+    return inflightRequests.get(url).then((resp) => resp.clone());
+}
+
+// Check if user is logged in on page load
+async function checkLogin() {
+    try {
+        const data = await fetchDashboard();
+        if (data === null) {
+            document.getElementById('login-modal').style.display = 'flex';
+            document.getElementById('dashboard').style.display = 'none';
+        } else {
+            document.getElementById('login-modal').style.display = 'none';
+            document.getElementById('dashboard').style.display = 'grid';
+        }
+    } catch (err) {
+        console.error('Auth check failed:', err);
+        document.getElementById('login-modal').style.display = 'flex';
+    }
+}
+
+// Handle login
+document.getElementById('login-form').addEventListener('submit', async (e) => {
+    e.preventDefault();
+    const username = document.getElementById('login-username').value;
+    const password = document.getElementById('login-password').value;
+
+    try {
+        const resp = await fetch('/api/auth/login', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            credentials: 'same-origin',
+            body: JSON.stringify({ username, password })
+        });
+
+        const data = await resp.json();
+        if (resp.ok) {
+            console.log('Login successful, user:', username);
+            document.getElementById('current-user').textContent = username;
+            document.getElementById('login-modal').style.display = 'none';
+            document.getElementById('dashboard').style.display = 'grid';
+            document.getElementById('login-form').reset();
+            refreshDashboard();
+        } else if (data.otp_required) {
+            console.log('OTP verification required');
+            // Store username and password for OTP submission
+            window.otpPending = { username, password };
+            document.getElementById('login-modal').style.display = 'none';
+            document.getElementById('otp-modal').style.display = 'flex';
+        } else {
+            alert('Login failed: ' + (data.error || 'Unknown error'));
+        }
+    } catch (err) {
+        console.error('Login error:', err);
+        alert('Login error: ' + err);
+    }
+});
+
+// Handle OTP submission
+document.getElementById('otp-form').addEventListener('submit', async (e) => {
+    e.preventDefault();
+    const otp_code = document.getElementById('otp-code').value;
+    const { username, password } = window.otpPending || {};
+
+    if (!username || !password) {
+        alert('Session expired. Please login again.');
+        document.getElementById('otp-modal').style.display = 'none';
+        document.getElementById('login-modal').style.display = 'flex';
+        return;
+    }
+
+    try {
+        const resp = await fetch('/api/auth/login', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            credentials: 'same-origin',
+            body: JSON.stringify({ username, password, otp_code })
+        });
+
+        const data = await resp.json();
+        if (resp.ok) {
+            console.log('OTP verification successful');
+            document.getElementById('current-user').textContent = username;
+            document.getElementById('otp-modal').style.display = 'none';
+            document.getElementById('dashboard').style.display = 'grid';
+            document.getElementById('otp-form').reset();
+            window.otpPending = null;
+            refreshDashboard();
+        } else {
+            alert('OTP verification failed: ' + (data.error || 'Invalid code'));
+            document.getElementById('otp-code').value = '';
+        }
+    } catch (err) {
+        console.error('OTP error:', err);
+        alert('OTP error: ' + err);
+    }
+});
+
+// Get demo OTP code
+async function getDemoOTP() {
+    const { username } = window.otpPending || {};
+    if (!username) {
+        alert('No username available');
+        return;
+    }
+
+    try {
+        const resp = await fetch(`/api/auth/demo-otp?username=${username}`);
+        const data = await resp.json();
+        if (resp.ok) {
+            document.getElementById('otp-code').value = data.otp_code;
+            alert('Demo OTP populated! Click "Verify & Login" to complete.');
+        } else {
+            alert('Failed to get OTP: ' + (data.error || 'Unknown error'));
+        }
+    } catch (err) {
+        alert('Error getting OTP: ' + err);
+    }
+}
+
+// Upload form handling
+const uploadForm = document.getElementById('upload-form');
+const fileInput = document.getElementById('file-input');
+const uploadProgress = document.getElementById('upload-progress');
+const filesList = document.getElementById('files-list');
+
+uploadForm.addEventListener('submit', async (e) => {
+    e.preventDefault();
+    const file = fileInput.files[0];
+    if (!file) { alert('Please choose a file to upload'); return; }
+
+    try {
+        const result = await uploadInChunks(file);
+        uploadProgress.style.width = '0%';
+        fileInput.value = '';
+        loadFiles();
+        alert(result.deduplicated ? 'File already stored' : 'Upload complete');
+    } catch (err) {
+        uploadProgress.style.width = '0%';
+        alert('Upload failed: ' + (err.message || err));
+    }
+});
+
+// Chunked uploads: the file is sent as 16 MB slices (several at once), then committed
+const UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024;
+const UPLOAD_CONCURRENCY = 4;
+
+function newUploadId() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + Math.random().toString(36).slice(2, 12);
+}
+
+// POST one slice; onProgress receives the bytes of this slice sent so far
+function sendChunk(uploadId, file, offset, onProgress) {
+    const blob = file.slice(offset, offset + UPLOAD_CHUNK_SIZE);
+    const params = new URLSearchParams({ upload_id: uploadId, offset: offset, total: file.size });
+    return new Promise((resolve, reject) => {
+        const xhr = new XMLHttpRequest();
+        xhr.open('POST', '/api/files/upload/chunk?' + params, true);
+        xhr.setRequestHeader('Content-Type', 'application/octet-stream');
+        xhr.upload.onprogress = (evt) => { if (evt.lengthComputable) onProgress(evt.loaded); };
+        xhr.onload = () => {
+            if (xhr.status >= 200 && xhr.status < 300) { onProgress(blob.size); resolve(); }
+            else reject(new Error(xhr.responseText));
+        };
+        xhr.onerror = () => reject(new Error('Upload error'));
+        xhr.send(blob);
+    });
+}
+
+async function uploadInChunks(file) {
+    const uploadId = newUploadId();
+    const offsets = [];
+    for (let offset = 0; offset < file.size || offsets.length === 0; offset += UPLOAD_CHUNK_SIZE) {
+        offsets.push(offset);
+    }
+
+    // Keep up to UPLOAD_CONCURRENCY slices in flight; progress sums every slice
+    const sentPerChunk = new Map();
+    const reportProgress = () => {
+        let sent = 0;
+        sentPerChunk.forEach((n) => { sent += n; });
+        const pct = file.size ? Math.round((sent / file.size) * 100) : 100;
+        uploadProgress.style.width = pct + '%';
+    };
+    const inflight = new Set();
+    for (const offset of offsets) {
+        if (inflight.size >= UPLOAD_CONCURRENCY) {
+            await Promise.race(inflight);
+        }
+        const p = sendChunk(uploadId, file, offset, (sent) => {
+            sentPerChunk.set(offset, sent);
+            reportProgress();
+        }).finally(() => inflight.delete(p));
+        inflight.add(p);
+    }
+    await Promise.all(inflight);
+
+    const resp = await fetch('/api/files/upload/commit', {
+        method: 'POST',
+        credentials: 'same-origin',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ upload_id: uploadId, filename: file.name })
+    });
+    const data = await resp.json();
+    if (!resp.ok) throw new Error(data.error || resp.statusText);
+    return data;
+}
+
+// Load file list from server
+async function loadFiles() {
+    try {
+        const resp = await dedupFetch('/api/files/list', {
+            credentials: 'same-origin'
+        });
+        if (!resp.ok) throw new Error('Failed to fetch files');
+        const data = await resp.json();
+        renderFiles(data.files || []);
+    } catch (err) {
+        filesRenderId++;
+        filesList.innerHTML = '<div style="color:#c00">Failed to load files</div>';
+        console.error(err);
+    }
+}
+
+function buildFileRow(f) {
+    const row = document.createElement('div');
+    row.className = 'list-row';
+
+    const left = document.createElement('div');
+    left.innerHTML = `<strong>${f.filename}</strong><div style="font-size:0.85em;color:#666">${(f.size_mb||0).toFixed(2)} MB — ${f.chunks} chunks — stored on ${f.stored_on}</div>`;
+
+    const right = document.createElement('div');
+    const btn = document.createElement('button');
+    btn.textContent = 'Download';
+    btn.className = 'download-btn';
+    btn.dataset.fileId = f.file_id;
+    btn.dataset.filename = f.filename;
+
+    right.appendChild(btn);
+    row.appendChild(left);
+    row.appendChild(right);
+    return row;
+}
+
+// One delegated handler for every Download button in the list
+filesList.addEventListener('click', e => {
+    const btn = e.target.closest('button[data-file-id]');
+    if (btn) showDownloadNodeSelector(btn.dataset.fileId, btn.dataset.filename);
+});
+
+// Rows rendered per frame; longer lists continue in idle callbacks
+const RENDER_BATCH = 50;
+const whenIdle = window.requestIdleCallback || (cb => requestAnimationFrame(() => cb()));
+let filesRenderId = 0;
+
+function renderFiles(list) {
+    // A newer render supersedes batches still queued from an older one
+    const renderId = ++filesRenderId;
+
+    if (list.length === 0) {
+        filesList.innerHTML = '<div style="color:#666">No files stored</div>';
+        return;
+    }
+
+    function renderChunk(i) {
+        if (renderId !== filesRenderId) return;
+        const end = Math.min(i + RENDER_BATCH, list.length);
+        // Build off-document so each batch reflows once
+        const frag = document.createDocumentFragment();
+        for (let k = i; k < end; k++) frag.appendChild(buildFileRow(list[k]));
+        if (i === 0) filesList.replaceChildren(frag);
+        else filesList.appendChild(frag);
+        if (end < list.length) whenIdle(() => renderChunk(end));
+    }
+    renderChunk(0);
+}
+
+// Last /api/nodes response, reused for NODES_CACHE_TTL ms
+const NODES_CACHE_TTL = 5000;
+window._nodesCache = null;
+
+async function getNodes(maxAge = NODES_CACHE_TTL) {
+    const cached = window._nodesCache;
+    if (cached && Date.now() - cached.at < maxAge) return cached.data;
+    const resp = await dedupFetch('/api/nodes', { credentials: 'same-origin' });
+    if (!resp.ok) throw new Error('Failed to fetch nodes');
+    const data = await resp.json();
+    window._nodesCache = { at: Date.now(), data: data };
+    return data;
+}
+
+// Load nodes and show status + allow selection
+// Always fetched fresh: this backs the Refresh Nodes button
+async function loadNodes() {
+    try {
+        const data = await getNodes(0);
+        renderNodes(data.nodes || [], data.preferred || null);
+    } catch (err) {
+        document.getElementById('nodes-list').innerHTML = '<div style="color:#c00">Failed to load nodes</div>';
+        console.error(err);
+    }
+}
+
+function renderNodes(list, preferred) {
+    const nodesList = document.getElementById('nodes-list');
+
+    if (list.length === 0) {
+        nodesList.innerHTML = '<div style="color:#666">No nodes available</div>';
+        return;
+    }
+
+    // update preferred display
+    const prefNameEl = document.getElementById('preferred-node-name');
+    if (prefNameEl) prefNameEl.textContent = preferred || 'None';
+
+    const frag = document.createDocumentFragment();
+    list.forEach(n => {
+        const row = document.createElement('div');
+        row.className = 'list-row';
+
+        const left = document.createElement('div');
+        left.innerHTML = `<strong>${n.node_id}</strong><div style="font-size:0.85em;color:#666">${n.ip} — ${n.used_gb.toFixed(2)} / ${n.capacity_gb.toFixed(2)} GB</div>`;
+
+        const right = document.createElement('div');
+        const status = document.createElement('span');
+        status.textContent = n.status === 'ALIVE' ? 'ONLINE' : 'OFFLINE';
+        status.className = n.status === 'ALIVE' ? 'status-badge status-online' : 'status-badge status-offline';
+
+        const btn = document.createElement('button');
+        btn.textContent = preferred === n.node_id ? 'Selected' : 'Select';
+        btn.disabled = preferred === n.node_id;
+        btn.onclick = async () => {
+            try {
+                const sel = await fetch('/api/nodes/select', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    credentials: 'same-origin',
+                    body: JSON.stringify({ node_id: n.node_id })
+                });
+                if (!sel.ok) throw new Error('Select failed');
+                window._nodesCache = null;
+                await loadNodes();
+                alert('Preferred node set to ' + n.node_id);
+            } catch (err) {
+                alert('Failed to select node: ' + err);
+            }
+        };
+
+        // highlight selected row
+        if (preferred === n.node_id) {
+            row.classList.add('selected-node');
+        }
+
+        right.appendChild(status);
+        right.appendChild(btn);
+        row.appendChild(left);
+        row.appendChild(right);
+        frag.appendChild(row);
+    });
+    nodesList.replaceChildren(frag);
+}
+
+// Show node selector modal for download
+async function showDownloadNodeSelector(fileId, filename) {
+    try {
+        // The dashboard poll keeps the cache fresh, so clicks between polls never fetch
+        const data = await getNodes(POLL_INTERVAL + NODES_CACHE_TTL);
+        const nodes = data.nodes || [];
+
+        if (nodes.length === 0) {
+            alert('No nodes available');
+            return;
+        }
+
+        // Create modal dynamically
+        const modal = document.createElement('div');
+        modal.className = 'selector-overlay';
+
+        const content = document.createElement('div');
+        content.className = 'selector-content';
+
+        const title = document.createElement('h3');
+        title.textContent = 'Download from Node';
+        content.appendChild(title);
+
+        const desc = document.createElement('p');
+        desc.textContent = 'Select which node to reconstruct and download the file from:';
+        content.appendChild(desc);
+
+        nodes.forEach(node => {
+            const nodeBtn = document.createElement('button');
+            nodeBtn.className = 'node-btn';
+            nodeBtn.innerHTML = `<strong>${node.node_id}</strong> (${node.status}) <br><small style="color:#666">${node.ip}</small>`;
+
+            nodeBtn.onclick = async () => {
+                modal.remove();
+                await downloadById(fileId, filename, node.node_id);
+            };
+
+            if (node.status !== 'ALIVE') {
+                nodeBtn.disabled = true;
+            }
+
+            content.appendChild(nodeBtn);
+        });
+
+        const cancelBtn = document.createElement('button');
+        cancelBtn.textContent = 'Cancel';
+        cancelBtn.className = 'cancel-btn';
+        cancelBtn.onclick = () => modal.remove();
+        content.appendChild(cancelBtn);
+
+        modal.appendChild(content);
+        document.body.appendChild(modal);
+
+    } catch (err) {
+        alert('Failed to show node selector: ' + err);
+    }
+}
+
+// Download by file id from specific node
+async function downloadById(fileId, filename, nodeId) {
+    try {
+        let url = `/api/files/download/${fileId}`;
+        if (nodeId) {
+            url += `?node_id=${encodeURIComponent(nodeId)}`;
+        }
+
+        // Where supported, stream straight to a file the user picks so
+        // the download is never held in memory as a whole
+        let writable = null;
+        if (window.showSaveFilePicker) {
+            try {
+                const handle = await window.showSaveFilePicker({ suggestedName: filename || fileId });
+                writable = await handle.createWritable();
+            } catch (err) {
+                if (err.name === 'AbortError') return;  // user cancelled the picker
+                writable = null;
+            }
+        }
+
+        if (!writable) {
+            // Let the browser's download manager fetch the attachment and
+            // stream it to disk; nothing is buffered in the page
+            const a = document.createElement('a');
+            a.href = url;
+            a.download = filename || fileId;
+            document.body.appendChild(a);
+            a.click();
+            a.remove();
+            return;
+        }
+
+        const resp = await fetch(url, {
+            credentials: 'same-origin'
+        });
+        if (!resp.ok) {
+            await writable.abort();
+            const text = await resp.text();
+            alert('Download failed: ' + text);
+            return;
+        }
+        await resp.body.pipeTo(writable);
+    } catch (err) {
+        alert('Download error: ' + err);
+    }
+}
+
+function enableOTP() {
+    alert('OTP setup is available via API; use the CLI or implement UI flows');
+}
+
+function logout() {
+    fetch('/api/auth/logout', {
+        method:'POST',
+        credentials: 'same-origin'
+    })
+        .then(()=>{ alert('Logged out'); window.location.reload(); })
+        .catch(()=>{ alert('Logout failed'); });
+}
+
+// Files and nodes in one request; resolves to null when not logged in
+async function fetchDashboard() {
+    const resp = await dedupFetch('/api/dashboard?include=files,nodes', { credentials: 'same-origin' });
+    if (resp.status === 401) return null;
+    if (!resp.ok) throw new Error('Failed to fetch dashboard');
+    const data = await resp.json();
+    window._nodesCache = { at: Date.now(), data: { nodes: data.nodes, preferred: data.preferred } };
+    renderFiles(data.files || []);
+    renderNodes(data.nodes || [], data.preferred || null);
+    return data;
+}
+
+// Auto-refresh dashboard data and file list
+async function refreshDashboard() {
+    try {
+        await fetchDashboard();
+    } catch (e) { console.error(e); }
+}
+
+// initial load
+checkLogin();
+
+// Poll only while the tab is visible; back off while the server is failing
+const POLL_INTERVAL = 8000;
+const POLL_MAX_INTERVAL = 60000;
+let pollDelay = POLL_INTERVAL;
+let pollTimer = null;
+
+async function tick() {
+    clearTimeout(pollTimer);
+    // Hidden tabs stop polling until visibilitychange restarts it
+    if (document.visibilityState !== 'visible') return;
+    try {
+        await fetchDashboard();
+        pollDelay = POLL_INTERVAL;
+    } catch (e) {
+        console.error(e);
+        pollDelay = Math.min(pollDelay * 2, POLL_MAX_INTERVAL);
+    }
+    pollTimer = setTimeout(tick, pollDelay);
+}
+
+document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'visible') tick();
+});
+pollTimer = setTimeout(tick, pollDelay);
@@ -3,17 +3,93 @@ Web-based User Interface for P2P Storage System
 Provides Google Drive-like interface for file management
 """
 
-from flask import Flask, render_template, request, jsonify, session, send_file
+from flask import Flask, Response, render_template, request, jsonify, session, send_file
 from flask_cors import CORS
+from werkzeug.utils import secure_filename
 import logging
 import os
-from datetime import datetime, timedelta
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
 from functools import wraps
-import json
+import gzip
+import hashlib
+import itertools
+import re
+from collections import OrderedDict
+
+from web.json_provider import OrjsonProvider, dumps_bytes
+from web.rate_limit import RateLimiter
+from web.session_store import MemorySessionInterface
 
 logger = logging.getLogger(__name__)
 
 
+def _content_etag(data: bytes) -> str:
+    """Content-hash ETag value used for every cached body this module serves"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+# Static dashboard page and script: read, hashed and gzipped once at import
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+with open(os.path.join(STATIC_DIR, 'dashboard.js'), 'rb') as _f:
+    DASHBOARD_JS_BYTES = _f.read()
+DASHBOARD_JS_ETAG = _content_etag(DASHBOARD_JS_BYTES)
+DASHBOARD_JS_GZIP = gzip.compress(DASHBOARD_JS_BYTES, compresslevel=9)
+# Versioned script URL, so browsers can cache it until the content changes
+DASHBOARD_JS_URL = f'/static/dashboard.js?v={DASHBOARD_JS_ETAG[:12]}'
+# One year, the conventional ceiling for immutable assets
+STATIC_MAX_AGE = 31536000
+
+with open(os.path.join(STATIC_DIR, 'index.html'), 'rb') as _f:
+    DASHBOARD_BYTES = _f.read().replace(b'src="/static/dashboard.js"',
+                                        f'src="{DASHBOARD_JS_URL}"'.encode())
+DASHBOARD_HTML = DASHBOARD_BYTES.decode('utf-8')
+DASHBOARD_ETAG = _content_etag(DASHBOARD_BYTES)
+DASHBOARD_GZIP = gzip.compress(DASHBOARD_BYTES, compresslevel=9)
+
+# Slice size of the chunked upload endpoint (matches UPLOAD_CHUNK_SIZE in dashboard.js);
+# every slice but the last must be exactly this long
+UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Client-chosen chunked upload ids (also used in temp file names)
+UPLOAD_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+# Largest accepted request body (uploads); override with WEB_MAX_UPLOAD_MB
+MAX_UPLOAD_BYTES = int(os.getenv('WEB_MAX_UPLOAD_MB', 4096)) * 1024 * 1024
+
+# Waitress worker threads (override with WEB_THREADS): enough that slow
+# uploads do not starve dashboard polls
+WEB_THREADS = int(os.getenv('WEB_THREADS', 32))
+
+# Seconds a node health broadcast result is reused across pollers
+HEALTH_TTL = 2.5
+
+# Reconstructed downloads in temp/ unused for this many seconds are removed
+TEMP_DOWNLOAD_MAX_AGE = 30 * 60
+
+# Reconstructions used this recently are never evicted, so a download that
+# just chose to reuse one can still open it
+TEMP_DOWNLOAD_REUSE_GRACE = 60
+
+# Total size of reconstructed downloads kept in temp/ before LRU eviction
+TEMP_DOWNLOAD_QUOTA = int(os.getenv('WEB_TEMP_QUOTA_MB', 5120)) * 1024 * 1024
+
+# Responses smaller than this, or of other types, are sent uncompressed
+COMPRESS_MIN_SIZE = 512
+COMPRESS_MIMETYPES = {'application/json', 'text/html', 'text/css', 'application/javascript'}
+
+# Sections /api/dashboard returns when no ?include= is given
+DASHBOARD_SECTIONS = {'system', 'storage', 'health', 'files', 'nodes'}
+
+# Max segment -> node entries kept in the download lookup index (LRU)
+SEGMENT_INDEX_SIZE = 100_000
+
+# Seconds a cached /api/files/list body stays valid between uploads/deletes
+FILES_LIST_TTL = 3.0
+
+
 class P2PWebUI:
     """
     Web-based UI for P2P Storage System
@@ -31,18 +107,87 @@ class P2PWebUI:
         """
         self.app = Flask(__name__)
         self.app.secret_key = 'p2p_storage_secret_key_change_in_production'
+        self.app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=8)
+        self.app.config['SESSION_REFRESH_EACH_REQUEST'] = False
+        self.app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
+        # Let a fronting web server (Apache/lighttpd/nginx) stream downloads itself
+        self.app.config['USE_X_SENDFILE'] = os.getenv('WEB_USE_X_SENDFILE', '0') == '1'
+        # Server-side sessions: the cookie only carries an opaque session id
+        self.app.session_interface = MemorySessionInterface()
+        self.app.json = OrjsonProvider(self.app)
         self.orchestrator = p2p_orchestrator
         self.host = host
         self.port = port
+
+        # Absolute temp dir for reconstructed downloads, created once up front
+        self.temp_dir = os.path.abspath(os.path.join(os.getcwd(), 'temp'))
+        os.makedirs(self.temp_dir, exist_ok=True)
+        # In-progress chunked uploads: upload_id -> {user, total, chunks: {offset: length}}
+        self.upload_dir = os.path.join(self.temp_dir, 'uploads')
+        os.makedirs(self.upload_dir, exist_ok=True)
+        self._uploads = {}
+
+        # Cached file list body, invalidated by bumping the version on change
+        self._files_version = 0
+        self._files_cache = None  # (version, expires_at, files, body)
+        self._cache_lock = threading.Lock()
+        self._health_cache = (0.0, {})  # (taken_at, health)
+        self._json_cache = {}  # name -> (expires_at, body, etag)
+        # Node set and network state changes drop the cached topology immediately
+        self.orchestrator.add_topology_listener(self.invalidate_topology)
+        self._last_temp_cleanup = 0.0
+        # Reconstructed download path -> last time it was served, plus per-file build locks
+        self._download_last_used = {}
+        self._download_locks = {}
+        self._upload_locks = {}
+
+        # Node order for segment placement and a round-robin cycle of default owners
+        self._node_tuple = ()
+        self._rr = None
+        self._rr_lock = threading.Lock()
+
+        # Shared pool for fanning segment stores out to nodes
+        self._store_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix='web-store')
+
+        # Separate pool for download probes, plus an LRU index of segment -> node
+        self._probe_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix='web-probe')
+        self._segment_index = OrderedDict()
+        self._index_lock = threading.Lock()
+        
+        # Per-client limits on the auth endpoints, checked before any password hashing
+        self.limiter = RateLimiter()
         
         # Enable CORS with credentials support
         CORS(self.app, supports_credentials=True, origins=['*'])
         
         # Register routes
         self._register_routes()
+        self.app.after_request(self._compress_response)
         
         logger.info(f"[Web] UI initialized on {host}:{port}")
     
+    def _compress_response(self, response):
+        """Gzip JSON/HTML responses for clients that accept it"""
+        response.vary.add('Accept-Encoding')
+        if (response.direct_passthrough  # send_file streams (user blobs)
+                or response.status_code != 200
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESS_MIMETYPES
+                or not request.accept_encodings['gzip']):
+            return response
+        
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        
+        response.set_data(gzip.compress(data, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+        # The encoded body differs byte-wise, so only a weak validator still holds
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+    
     def _require_login(self, f):
         """Decorator to require user login"""
         @wraps(f)
@@ -52,9 +197,411 @@ class P2PWebUI:
             return f(*args, **kwargs)
         return decorated_function
     
+    def _nodes(self) -> tuple:
+        """Nodes in registration order, rebuilt only when the node set changes"""
+        if len(self._node_tuple) != len(self.orchestrator.nodes):
+            with self._rr_lock:
+                self._node_tuple = tuple(self.orchestrator.nodes.values())
+                self._rr = itertools.cycle(self._node_tuple)
+        return self._node_tuple
+
+    def _next_owner(self):
+        """Pick the next default owner node in round-robin order"""
+        self._nodes()
+        with self._rr_lock:
+            return next(self._rr)
+
+    def _ingest_upload(self, stream, filename: str):
+        """
+        Chunk an uploaded stream on an owner node and distribute its segments
+        Content already in the network is not stored again
+        """
+        try:
+            # Upload to network - use preferred node from session if set
+            preferred = session.get('preferred_node')
+            if preferred and preferred in self.orchestrator.nodes:
+                node = self.orchestrator.nodes[preferred]
+            else:
+                node = self._next_owner()
+
+            # Chunk straight from the stream - no extra copy on disk
+            known_before = node.storage.snapshot_metadata()
+            file_id, segments = node.storage.chunk_file_stream(stream, filename)
+            logger.info(f"[Web Upload] Using node {getattr(node, 'node_id', getattr(node, 'id', 'unknown'))} for initial chunking")
+
+            with self._cache_lock:
+                upload_lock = self._upload_locks.setdefault(file_id, threading.Lock())
+            with upload_lock:
+                # file_id is derived from the content hash: if the network
+                # already holds this content, keep the existing copy
+                holders = [n for n in self._nodes()
+                           if n is not node and file_id in n.storage.snapshot_metadata()]
+                if file_id in known_before or holders:
+                    node.storage.restore_metadata(file_id, known_before.get(file_id))
+                    if file_id in known_before:
+                        holders.append(node)
+                    # The stored copy takes the latest name it was uploaded under
+                    for holder in holders:
+                        holder.storage.rename_file(file_id, filename)
+                    self._invalidate_files_cache()
+                    logger.info(f"[Web Upload] Content of '{filename}' already stored as {file_id}; skipping distribution")
+                    return jsonify({
+                        'success': True,
+                        'file_id': file_id,
+                        'filename': filename,
+                        'total_chunks': len(segments),
+                        'deduplicated': True,
+                        'message': 'File already stored'
+                    }), 200
+
+                self._store_file_segments(node, segments)
+
+            self._invalidate_files_cache()
+
+            return jsonify({
+                'success': True,
+                'file_id': file_id,
+                'filename': filename,
+                'total_chunks': len(segments),
+                'message': 'File uploaded successfully'
+            }), 201
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    def _store_file_segments(self, node, segments):
+        """Distribute a chunked file's segments round-robin and persist the owner's metadata"""
+        # Distribute segments concurrently across nodes
+        node_list = self._nodes()
+        placements = [(node_list[i % len(node_list)], segment) for i, segment in enumerate(segments)]
+        results = list(self._store_pool.map(
+            lambda p: p[0].storage.store_segment(p[1], persist=False), placements
+        ))
+        for i, ((target_node, segment), stored) in enumerate(zip(placements, results)):
+            target_id = getattr(target_node, 'node_id', getattr(target_node, 'id', 'unknown'))
+            if stored:
+                self._remember_segment(segment.segment_id, target_id)
+                logger.info(f"[Web Upload] Stored segment {i+1}/{len(segments)} on {target_id}")
+            else:
+                logger.warning(f"[Web Upload] Failed to store segment {i+1}/{len(segments)} on {target_id}")
+
+        # Persist metadata for owner node so downloads survive server restarts
+        try:
+            node.storage.save_metadata()
+        except Exception:
+            logger.warning(f"[Web Upload] Failed to persist metadata for {getattr(node,'node_id', getattr(node,'id','unknown'))}")
+
+    def _invalidate_files_cache(self):
+        """Invalidate the cached file list after an upload or delete"""
+        with self._cache_lock:
+            self._files_version += 1
+            self._files_cache = None
+        self.invalidate_topology()
+
+    def invalidate_topology(self):
+        """Drop the cached topology body (call when nodes or their contents change)"""
+        with self._cache_lock:
+            self._json_cache.pop('topology', None)
+
+    def _cached_json_response(self, name: str, builder, ttl: float = HEALTH_TTL):
+        """
+        Serve builder()'s result as JSON, serialized at most once per TTL
+        The cached body carries an ETag so unchanged polls get a 304
+        """
+        now = time.monotonic()
+        with self._cache_lock:
+            cached = self._json_cache.get(name)
+        if cached is None or cached[0] <= now:
+            body = dumps_bytes(builder())
+            cached = (now + ttl, body, _content_etag(body))
+            with self._cache_lock:
+                self._json_cache[name] = cached
+        
+        response = Response(cached[1], mimetype='application/json')
+        response.set_etag(cached[2])
+        return response.make_conditional(request)
+
+    def _revalidated_json(self, body: bytes) -> Response:
+        """
+        Serve a JSON body that clients must revalidate on every poll
+        The ETag is a content hash, so an unchanged body is answered 304
+        """
+        response = Response(body, mimetype='application/json')
+        response.set_etag(_content_etag(body))
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    def _files_list_body(self) -> bytes:
+        """Return the JSON body for /api/files/list, built at most once per TTL"""
+        return self._files_list()[1]
+
+    def _files_list(self):
+        """Return (files, JSON body) for the network's file list, built at most once per TTL"""
+        now = time.monotonic()
+        with self._cache_lock:
+            version = self._files_version
+            cached = self._files_cache
+            if cached and cached[0] == version and cached[1] > now:
+                return cached[2], cached[3]
+
+        files = []
+        append = files.append
+        for node_id, node in self.orchestrator.nodes.items():
+            for file_id, metadata in node.storage.snapshot_metadata().items():
+                append({
+                    'file_id': file_id,
+                    'filename': metadata.original_filename,
+                    'size_bytes': metadata.total_size_bytes,
+                    'size_mb': metadata.total_size_bytes / (1024*1024),
+                    'chunks': metadata.total_chunks,
+                    'created_at': metadata.created_at,
+                    'stored_on': node_id
+                })
+
+        body = dumps_bytes({
+            'success': True,
+            'files': files,
+            'total': len(files)
+        })
+
+        with self._cache_lock:
+            # Only publish if nothing changed while the list was being built
+            if self._files_version == version:
+                self._files_cache = (version, now + FILES_LIST_TTL, files, body)
+        return files, body
+
+    def _remember_segment(self, segment_id: str, node_id: str):
+        """Record which node holds a segment, evicting the least recently used entry"""
+        with self._index_lock:
+            self._segment_index[segment_id] = node_id
+            self._segment_index.move_to_end(segment_id)
+            if len(self._segment_index) > SEGMENT_INDEX_SIZE:
+                self._segment_index.popitem(last=False)
+
+    def _find_segment(self, segment_id: str):
+        """
+        Retrieve a segment from whichever node holds it
+        Goes straight to the last known holder; otherwise probes all nodes
+        concurrently and takes the first hit
+        """
+        nodes = self.orchestrator.nodes
+        with self._index_lock:
+            known = self._segment_index.get(segment_id)
+            if known is not None:
+                self._segment_index.move_to_end(segment_id)
+        if known in nodes:
+            seg = nodes[known].storage.retrieve_segment(segment_id)
+            if seg is not None:
+                return seg
+
+        futures = {
+            self._probe_pool.submit(node.storage.retrieve_segment, segment_id): node_id
+            for node_id, node in nodes.items()
+        }
+        try:
+            for future in as_completed(futures):
+                try:
+                    seg = future.result()
+                except Exception as e:
+                    logger.warning(f"[Web Download] Probe of {futures[future]} for {segment_id} failed: {e}")
+                    continue
+                if seg is not None:
+                    self._remember_segment(segment_id, futures[future])
+                    return seg
+        finally:
+            for future in futures:
+                future.cancel()
+        return None
+
+    def _cached_health(self) -> dict:
+        """Return the latest health broadcast, re-running it at most once per TTL"""
+        now = time.monotonic()
+        taken_at, health = self._health_cache
+        if now - taken_at < HEALTH_TTL:
+            return health
+        health = self.orchestrator.broadcast_health_check()
+        self._health_cache = (now, health)
+        return health
+
+    def _is_reconstruction_current(self, output_path: str, metadata) -> bool:
+        """Whether output_path holds a complete reconstruction newer than the file's metadata"""
+        try:
+            st = os.stat(output_path)
+        except OSError:
+            return False
+        return (metadata is not None
+                and st.st_size == metadata.total_size_bytes
+                and st.st_mtime > metadata.created_at.timestamp())
+
+    def _cleanup_temp_downloads(self):
+        """
+        Evict reconstructed downloads from the temp dir (at most once a minute)
+        Files unused for TEMP_DOWNLOAD_MAX_AGE go first; then least recently
+        used files until the total is under TEMP_DOWNLOAD_QUOTA. Files used in
+        the last TEMP_DOWNLOAD_REUSE_GRACE seconds, or being checked for reuse
+        by a download, are kept
+        """
+        now = time.time()
+        if now - self._last_temp_cleanup < 60:
+            return
+        self._last_temp_cleanup = now
+        
+        try:
+            candidates = []
+            with os.scandir(self.temp_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('_download') or not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    last_used = self._download_last_used.get(entry.path, st.st_mtime)
+                    candidates.append((last_used, st.st_size, entry.path))
+        except OSError as e:
+            logger.warning(f"[Web Download] Temp cleanup failed: {e}")
+            return
+        
+        candidates.sort()
+        total = sum(size for _, size, _ in candidates)
+        for last_used, size, path in candidates:
+            if now - last_used <= TEMP_DOWNLOAD_MAX_AGE and total <= TEMP_DOWNLOAD_QUOTA:
+                break
+            file_id = os.path.basename(path)[:-len('_download')]
+            with self._cache_lock:
+                build_lock = self._download_locks.setdefault(file_id, threading.Lock())
+            if not build_lock.acquire(blocking=False):
+                continue  # A download is deciding whether to reuse it
+            try:
+                if now - self._download_last_used.get(path, last_used) < TEMP_DOWNLOAD_REUSE_GRACE:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Still being sent - try again next sweep
+                    continue
+                self._download_last_used.pop(path, None)
+            finally:
+                build_lock.release()
+            total -= size
+            logger.info(f"[Web Download] Evicted temp file {os.path.basename(path)}")
+        
+        self._cleanup_stale_uploads(now)
+
+    def _cleanup_stale_uploads(self, now: float):
+        """Drop chunked uploads that were never committed, with or without a part file"""
+        try:
+            with os.scandir(self.upload_dir) as entries:
+                parts = {entry.name[:-len('.part')]: entry.stat().st_mtime
+                         for entry in entries if entry.name.endswith('.part')}
+        except OSError as e:
+            logger.warning(f"[Web Upload] Upload cleanup failed: {e}")
+            return
+        
+        with self._cache_lock:
+            stale = [upload_id for upload_id, upload in self._uploads.items()
+                     if now - upload['last_used'] > TEMP_DOWNLOAD_MAX_AGE]
+            stale += [upload_id for upload_id, mtime in parts.items()
+                      if upload_id not in self._uploads and now - mtime > TEMP_DOWNLOAD_MAX_AGE]
+            for upload_id in stale:
+                self._uploads.pop(upload_id, None)
+        
+        for upload_id in stale:
+            if upload_id not in parts:
+                continue
+            try:
+                os.remove(os.path.join(self.upload_dir, f"{upload_id}.part"))
+                logger.info(f"[Web Upload] Removed abandoned upload {upload_id}")
+            except OSError:
+                pass
+
+    def _nodes_status(self) -> list:
+        """Per-node status and storage summary for the dashboard"""
+        nodes = []
+        health = self._cached_health()
+        for node_id, node in self.orchestrator.nodes.items():
+            info = node.storage.get_storage_info()
+            nodes.append({
+                'node_id': node_id,
+                'ip': getattr(node, 'network_ip', getattr(node, 'ip', 'unknown')),
+                'capacity_gb': info.get('capacity_gb', 0),
+                'used_gb': info.get('used_gb', 0),
+                'status': 'ALIVE' if health.get(node_id, False) else 'DEAD'
+            })
+        return nodes
+
+    def _compute_health(self) -> dict:
+        """Summarize node liveness from a health broadcast"""
+        health = self._cached_health()
+        
+        alive_count = sum(1 for alive in health.values() if alive)
+        
+        return {
+            'nodes': health,
+            'alive': alive_count,
+            'total': len(health),
+            'status': 'HEALTHY' if alive_count == len(health) else 'DEGRADED'
+        }
+
+    def _compute_storage(self) -> dict:
+        """Aggregate storage info across all nodes"""
+        nodes_storage = {}
+        
+        total_capacity = 0
+        total_used = 0
+        
+        for node_id, node in self.orchestrator.nodes.items():
+            info = node.storage.get_storage_info()
+            nodes_storage[node_id] = info
+            
+            total_capacity += info['capacity_gb']
+            total_used += info['used_gb']
+        
+        return {
+            'nodes': nodes_storage,
+            'total': {
+                'capacity_gb': total_capacity,
+                'used_gb': total_used,
+                'available_gb': total_capacity - total_used,
+                'utilization_percent': (total_used / total_capacity * 100) if total_capacity > 0 else 0
+            }
+        }
+
+    def demo_otp(self):
+        """Get current OTP code for demo users (demo only)"""
+        try:
+            username = request.args.get('username')
+            users = self.orchestrator.auth_manager.users
+            user = users.get(username) if username else None
+            if user is None:
+                return jsonify({'error': 'Invalid username'}), 400
+            
+            otp_manager = user.otp_manager
+            if not user.otp_enabled or not otp_manager:
+                return jsonify({'error': 'OTP not enabled for user'}), 400
+            
+            # Get current OTP code
+            current_code = otp_manager.get_current_code()
+            logger.info(f"[Demo] Current OTP for {username}: {current_code}")
+            
+            return jsonify({
+                'otp_code': current_code,
+                'message': 'Current OTP code (valid for ~30 seconds)'
+            }), 200
+        except Exception as e:
+            logger.error(f"[Demo OTP] Error: {e}")
+            return jsonify({'error': str(e)}), 500
+
+    def list_files(self):
+        """List all files in network"""
+        return self._revalidated_json(self._files_list_body())
+
     def _register_routes(self):
         """Register all Flask routes"""
         
+        # Hot read-only endpoints are bound methods rather than closures
+        self.app.add_url_rule('/api/auth/demo-otp', 'demo_otp',
+                              self.limiter.limit('10/minute')(self.demo_otp), methods=['GET'])
+        self.app.add_url_rule('/api/files/list', 'list_files',
+                              self._require_login(self.list_files), methods=['GET'])
+        
         # Authentication endpoints
         @self.app.route('/api/auth/register', methods=['POST'])
         def register():
@@ -77,6 +624,7 @@ class P2PWebUI:
                 return jsonify({'error': message}), 400
         
         @self.app.route('/api/auth/login', methods=['POST'])
+        @self.limiter.limit('5/minute')
         def login():
             """Authenticate user"""
             try:
@@ -94,6 +642,8 @@ class P2PWebUI:
                         username, password, otp_code
                     )
                     if success:
+                        # A fresh session id, so an id planted before login cannot be reused
+                        session.regenerate()
                         session['user'] = username
                         session['token'] = token
                         logger.info(f"[Auth] User {username} logged in with OTP")
@@ -112,6 +662,8 @@ class P2PWebUI:
                 )
                 
                 if success:
+                    # A fresh session id, so an id planted before login cannot be reused
+                    session.regenerate()
                     session['user'] = username
                     session['token'] = token
                     logger.info(f"[Auth] User {username} logged in successfully")
@@ -137,30 +689,6 @@ class P2PWebUI:
                 logger.error(f"[Auth] Login error: {e}")
                 return jsonify({'error': str(e)}), 500
         
-        @self.app.route('/api/auth/demo-otp', methods=['GET'])
-        def demo_otp():
-            """Get current OTP code for demo users (demo only)"""
-            try:
-                username = request.args.get('username')
-                if not username or username not in self.orchestrator.auth_manager.users:
-                    return jsonify({'error': 'Invalid username'}), 400
-                
-                user = self.orchestrator.auth_manager.users[username]
-                if not user.otp_enabled or not user.otp_manager:
-                    return jsonify({'error': 'OTP not enabled for user'}), 400
-                
-                # Get current OTP code
-                current_code = user.otp_manager.get_current_code()
-                logger.info(f"[Demo] Current OTP for {username}: {current_code}")
-                
-                return jsonify({
-                    'otp_code': current_code,
-                    'message': 'Current OTP code (valid for ~30 seconds)'
-                }), 200
-            except Exception as e:
-                logger.error(f"[Demo OTP] Error: {e}")
-                return jsonify({'error': str(e)}), 500
-        
         @self.app.route('/api/auth/logout', methods=['POST'])
         @self._require_login
         def logout():
@@ -199,70 +727,95 @@ class P2PWebUI:
             file = request.files['file']
             if file.filename == '':
                 return jsonify({'error': 'No file selected'}), 400
+            filename = secure_filename(file.filename) or 'upload'
             
-            # Save file temporarily
-            temp_path = f"temp/{file.filename}"
-            os.makedirs("temp", exist_ok=True)
-            file.save(temp_path)
-            
+            return self._ingest_upload(file.stream, filename)
+        
+        @self.app.route('/api/files/upload/chunk', methods=['POST'])
+        @self._require_login
+        def upload_chunk():
+            """Receive one slice of a chunked upload and write it at its offset"""
+            upload_id = request.args.get('upload_id', '')
             try:
-                # Upload to network - use preferred node from session if set
-                preferred = session.get('preferred_node')
-                if preferred and preferred in self.orchestrator.nodes:
-                    node = self.orchestrator.nodes[preferred]
-                else:
-                    node = list(self.orchestrator.nodes.values())[0]
-
-                file_id, segments = node.storage.chunk_file(temp_path)
-                logger.info(f"[Web Upload] Using node {getattr(node, 'node_id', getattr(node, 'id', 'unknown'))} for initial chunking")
-                
-                # Distribute segments
-                node_list = list(self.orchestrator.nodes.values())
-                for i, segment in enumerate(segments):
-                    target_node = node_list[i % len(node_list)]
-                    target_node.storage.store_segment(segment)
-                    logger.info(f"[Web Upload] Stored segment {i+1}/{len(segments)} on {getattr(target_node, 'node_id', getattr(target_node, 'id', 'unknown'))}")
-                
-                # Persist metadata for owner node so downloads survive server restarts
-                try:
-                    node.storage.save_metadata()
-                except Exception:
-                    logger.warning(f"[Web Upload] Failed to persist metadata for {getattr(node,'node_id', getattr(node,'id','unknown'))}")
-
-                return jsonify({
-                    'success': True,
-                    'file_id': file_id,
-                    'filename': file.filename,
-                    'total_chunks': len(segments),
-                    'message': 'File uploaded successfully'
-                }), 201
+                offset = int(request.args.get('offset', ''))
+                total = int(request.args.get('total', ''))
+            except ValueError:
+                return jsonify({'error': 'offset and total must be integers'}), 400
+            if not UPLOAD_ID_PATTERN.match(upload_id):
+                return jsonify({'error': 'Invalid upload_id'}), 400
+            length = request.content_length or 0
+            if offset < 0 or not 0 <= total <= MAX_UPLOAD_BYTES or offset + length > total:
+                return jsonify({'error': 'Chunk outside declared upload size'}), 400
+            if length > UPLOAD_CHUNK_SIZE:
+                return jsonify({'error': f'Chunks are limited to {UPLOAD_CHUNK_SIZE} bytes'}), 413
+            # Slices tile the file exactly, so counting bytes proves every byte arrived
+            if offset % UPLOAD_CHUNK_SIZE or length != min(UPLOAD_CHUNK_SIZE, total - offset):
+                return jsonify({'error': f'Chunks must be {UPLOAD_CHUNK_SIZE}-byte aligned slices'}), 400
             
-            except Exception as e:
+            self._store_pool.submit(self._cleanup_temp_downloads)
+            
+            user = session['user']
+            with self._cache_lock:
+                upload = self._uploads.setdefault(upload_id, {'user': user, 'total': total, 'chunks': {},
+                                                              'last_used': time.time()})
+            if upload['user'] != user or upload['total'] != total:
+                return jsonify({'error': 'Upload belongs to another session or size changed'}), 409
+            
+            # Stream the body to its offset instead of buffering it through request.files
+            part_path = os.path.join(self.upload_dir, f"{upload_id}.part")
+            fd = os.open(part_path, os.O_WRONLY | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o600)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.seek(offset)
+                    received = 0
+                    while received < length:
+                        block = request.stream.read(min(1024 * 1024, length - received))
+                        if not block:
+                            break
+                        f.write(block)
+                        received += len(block)
+            except OSError as e:
                 return jsonify({'error': str(e)}), 500
+            if received != length:
+                return jsonify({'error': 'Incomplete chunk body'}), 400
+            
+            with self._cache_lock:
+                upload['chunks'][offset] = length
+                upload['last_used'] = time.time()
+                done = sum(upload['chunks'].values())
+            return jsonify({'success': True, 'upload_id': upload_id, 'received': done, 'total': total}), 200
         
-        @self.app.route('/api/files/list', methods=['GET'])
+        @self.app.route('/api/files/upload/commit', methods=['POST'])
         @self._require_login
-        def list_files():
-            """List all files in network"""
-            files = []
+        def upload_commit():
+            """Finish a chunked upload: chunk the assembled file into the network"""
+            data = request.json or {}
+            upload_id = data.get('upload_id', '')
+            if not UPLOAD_ID_PATTERN.match(upload_id):
+                return jsonify({'error': 'Invalid upload_id'}), 400
+            filename = secure_filename(data.get('filename') or '') or 'upload'
             
-            for node_id, node in self.orchestrator.nodes.items():
-                for file_id, metadata in node.storage.file_metadata.items():
-                    files.append({
-                        'file_id': file_id,
-                        'filename': metadata.original_filename,
-                        'size_bytes': metadata.total_size_bytes,
-                        'size_mb': metadata.total_size_bytes / (1024*1024),
-                        'chunks': metadata.total_chunks,
-                        'created_at': metadata.created_at.isoformat(),
-                        'stored_on': node_id
-                    })
+            part_path = os.path.join(self.upload_dir, f"{upload_id}.part")
+            with self._cache_lock:
+                upload = self._uploads.get(upload_id)
+                if upload is None or upload['user'] != session['user']:
+                    return jsonify({'error': 'Unknown upload'}), 404
+                try:
+                    part_size = os.path.getsize(part_path)
+                except OSError:
+                    part_size = -1
+                if sum(upload['chunks'].values()) != upload['total'] or part_size != upload['total']:
+                    return jsonify({'error': 'Upload incomplete'}), 409
+                del self._uploads[upload_id]
             
-            return jsonify({
-                'success': True,
-                'files': files,
-                'total': len(files)
-            }), 200
+            try:
+                with open(part_path, 'rb') as f:
+                    return self._ingest_upload(f, filename)
+            finally:
+                try:
+                    os.remove(part_path)
+                except OSError:
+                    pass
         
         @self.app.route('/api/files/download/<file_id>', methods=['GET'])
         @self._require_login
@@ -274,17 +827,20 @@ class P2PWebUI:
                 
                 # Find a node that has metadata for this file
                 owner_node = None
+                metadata = None
                 
                 # Try preferred node first if specified
                 if preferred_node_id and preferred_node_id in self.orchestrator.nodes:
                     candidate = self.orchestrator.nodes[preferred_node_id]
-                    if file_id in candidate.storage.file_metadata:
+                    metadata = candidate.storage.snapshot_metadata().get(file_id)
+                    if metadata is not None:
                         owner_node = candidate
                 
                 # Fall back to searching all nodes
                 if owner_node is None:
                     for node in self.orchestrator.nodes.values():
-                        if file_id in node.storage.file_metadata:
+                        metadata = node.storage.snapshot_metadata().get(file_id)
+                        if metadata is not None:
                             owner_node = node
                             break
 
@@ -293,37 +849,55 @@ class P2PWebUI:
                     return jsonify({'error': 'File metadata not found on any node'}), 404
 
                 # Use an absolute temp path so reconstruction can write reliably
-                temp_dir = os.path.abspath(os.path.join(os.getcwd(), 'temp'))
-                os.makedirs(temp_dir, exist_ok=True)
-                output_path = os.path.join(temp_dir, f"{file_id}_download")
-
-                # Callback to retrieve segments from any node
-                def get_segment_callback(segment_id):
-                    for n in self.orchestrator.nodes.values():
-                        seg = n.storage.retrieve_segment(segment_id)
-                        if seg is not None:
-                            return seg
-                    return None
+                output_path = os.path.join(self.temp_dir, f"{file_id}_download")
+                self._store_pool.submit(self._cleanup_temp_downloads)
 
                 owner_node_id = getattr(owner_node,'node_id', getattr(owner_node,'id','unknown'))
-                logger.info(f"[Web Download] Attempting reconstruction for {file_id} using owner {owner_node_id} (preferred: {preferred_node_id or 'none'})")
-                success = owner_node.storage.reconstruct_file(file_id, output_path, get_segment_callback=get_segment_callback)
-                logger.info(f"[Web Download] Reconstruction result for {file_id}: {success}")
+
+                # One reconstruction per file at a time; later requests reuse it
+                with self._cache_lock:
+                    build_lock = self._download_locks.setdefault(file_id, threading.Lock())
+                with build_lock:
+                    if self._is_reconstruction_current(output_path, metadata):
+                        logger.info(f"[Web Download] Reusing reconstruction of {file_id}")
+                        success = True
+                    else:
+                        # Callback to retrieve segments from any node
+                        get_segment_callback = self._find_segment
+
+                        logger.info(f"[Web Download] Attempting reconstruction for {file_id} using owner {owner_node_id} (preferred: {preferred_node_id or 'none'})")
+                        # Build under a private name so a partial file is never served or reused
+                        partial_path = f"{output_path}.{threading.get_ident()}.part"
+                        success = owner_node.storage.reconstruct_file(file_id, partial_path, get_segment_callback=get_segment_callback)
+                        if success:
+                            os.replace(partial_path, output_path)
+                        elif os.path.exists(partial_path):
+                            os.remove(partial_path)
+                        logger.info(f"[Web Download] Reconstruction result for {file_id}: {success}")
+                    if success:
+                        # Marked before the lock is released, so the temp sweep keeps it
+                        self._download_last_used[output_path] = time.time()
 
                 if success:
                     # Attempt to use original filename when sending
-                    metadata = owner_node.storage.file_metadata.get(file_id)
                     original_name = getattr(metadata, 'original_filename', None) if metadata else None
+                    # Conditional responses give ETag/Last-Modified revalidation and
+                    # Range support, so interrupted downloads can resume; an opaque
+                    # attachment lets the browser stream it straight to disk
                     try:
                         if original_name:
-                            return send_file(output_path, as_attachment=True, download_name=original_name)
+                            return send_file(output_path, mimetype='application/octet-stream', as_attachment=True,
+                                             download_name=original_name, conditional=True, etag=True)
                         else:
-                            return send_file(output_path, as_attachment=True)
+                            return send_file(output_path, mimetype='application/octet-stream', as_attachment=True,
+                                             conditional=True, etag=True)
                     except TypeError:
                         # Fallback for older Flask versions that use `attachment_filename`
                         if original_name:
-                            return send_file(output_path, as_attachment=True, attachment_filename=original_name)
-                        return send_file(output_path, as_attachment=True)
+                            return send_file(output_path, mimetype='application/octet-stream', as_attachment=True,
+                                             attachment_filename=original_name, conditional=True)
+                        return send_file(output_path, mimetype='application/octet-stream', as_attachment=True,
+                                         conditional=True)
                 else:
                     logger.error(f"[Web Download] Reconstruction failed for {file_id}; check segments and metadata")
                     return jsonify({'error': 'File reconstruction failed or segments missing'}), 404
@@ -335,23 +909,17 @@ class P2PWebUI:
         @self._require_login
         def delete_file(file_id):
             """Delete file from network"""
-            # Implement file deletion across nodes
-            deleted_count = 0
+            # Delete on all nodes concurrently; each rebuilds its segment dict once
+            nodes = list(self.orchestrator.nodes.values())
+            deleted_count = sum(self._store_pool.map(
+                lambda node: node.storage.delete_file(file_id), nodes
+            ))
             
-            for node_id, node in self.orchestrator.nodes.items():
-                if file_id in node.storage.file_metadata:
-                    del node.storage.file_metadata[file_id]
-                    deleted_count += 1
-                
-                # Delete segments
-                segments_to_delete = [
-                    sid for sid in node.storage.file_segments.keys()
-                    if sid.startswith(f"{file_id}_chunk_")
-                ]
-                
-                for segment_id in segments_to_delete:
-                    del node.storage.file_segments[segment_id]
-                    deleted_count += 1
+            with self._index_lock:
+                for segment_id in [sid for sid in self._segment_index if sid.startswith(f"{file_id}_chunk_")]:
+                    del self._segment_index[segment_id]
+
+            self._invalidate_files_cache()
             
             return jsonify({
                 'success': True,
@@ -364,75 +932,36 @@ class P2PWebUI:
         @self._require_login
         def network_topology():
             """Get network topology"""
-            topology = self.orchestrator.virtual_network.get_network_topology()
-            return jsonify(topology), 200
+            return self._cached_json_response(
+                'topology', self.orchestrator.virtual_network.get_network_topology
+            )
         
         @self.app.route('/api/network/statistics', methods=['GET'])
         @self._require_login
         def network_statistics():
             """Get network statistics"""
-            stats = self.orchestrator.virtual_network.get_statistics()
-            return jsonify(stats), 200
+            return self._cached_json_response(
+                'statistics', self.orchestrator.virtual_network.get_statistics
+            )
         
         @self.app.route('/api/network/health', methods=['GET'])
         @self._require_login
         def network_health():
             """Get network health status"""
-            health = self.orchestrator.broadcast_health_check()
-            
-            alive_count = sum(1 for alive in health.values() if alive)
-            
-            return jsonify({
-                'nodes': health,
-                'alive': alive_count,
-                'total': len(health),
-                'status': 'HEALTHY' if alive_count == len(health) else 'DEGRADED'
-            }), 200
+            return jsonify(self._compute_health()), 200
         
         @self.app.route('/api/storage/status', methods=['GET'])
         @self._require_login
         def storage_status():
             """Get storage status across all nodes"""
-            nodes_storage = {}
-            
-            total_capacity = 0
-            total_used = 0
-            
-            for node_id, node in self.orchestrator.nodes.items():
-                info = node.storage.get_storage_info()
-                nodes_storage[node_id] = info
-                
-                total_capacity += info['capacity_gb']
-                total_used += info['used_gb']
-            
-            return jsonify({
-                'nodes': nodes_storage,
-                'total': {
-                    'capacity_gb': total_capacity,
-                    'used_gb': total_used,
-                    'available_gb': total_capacity - total_used,
-                    'utilization_percent': (total_used / total_capacity * 100) if total_capacity > 0 else 0
-                }
-            }), 200
+            return jsonify(self._compute_storage()), 200
 
         @self.app.route('/api/nodes', methods=['GET'])
         @self._require_login
         def get_nodes():
             """Return list of nodes with status and storage info"""
-            nodes = []
-            health = self.orchestrator.broadcast_health_check()
-            for node_id, node in self.orchestrator.nodes.items():
-                info = node.storage.get_storage_info()
-                nodes.append({
-                    'node_id': node_id,
-                    'ip': getattr(node, 'network_ip', getattr(node, 'ip', 'unknown')),
-                    'capacity_gb': info.get('capacity_gb', 0),
-                    'used_gb': info.get('used_gb', 0),
-                    'status': 'ALIVE' if health.get(node_id, False) else 'DEAD'
-                })
-
             preferred = session.get('preferred_node')
-            return jsonify({'nodes': nodes, 'preferred': preferred}), 200
+            return self._revalidated_json(dumps_bytes({'nodes': self._nodes_status(), 'preferred': preferred}))
 
         @self.app.route('/api/nodes/select', methods=['POST'])
         @self._require_login
@@ -449,777 +978,96 @@ class P2PWebUI:
         @self.app.route('/api/dashboard', methods=['GET'])
         @self._require_login
         def dashboard():
-            """Get dashboard data"""
-            info = self.orchestrator.get_system_info()
+            """
+            Get dashboard data in one round trip
+            ?include=files,nodes limits the response to the listed sections
+            (system, storage, health, files, nodes); default is all of them
+            """
+            include = request.args.get('include')
+            sections = set(include.split(',')) if include else DASHBOARD_SECTIONS
             
-            return jsonify({
-                'system': info,
-                'storage': requests.get('/api/storage/status').json,
-                'health': requests.get('/api/network/health').json
-            }), 200
+            data = {}
+            if 'system' in sections:
+                data['system'] = self.orchestrator.get_system_info()
+            if 'storage' in sections:
+                data['storage'] = self._compute_storage()
+            if 'health' in sections:
+                data['health'] = self._compute_health()
+            if 'files' in sections:
+                data['files'] = self._files_list()[0]
+            if 'nodes' in sections:
+                data['nodes'] = self._nodes_status()
+                data['preferred'] = session.get('preferred_node')
+            return self._revalidated_json(dumps_bytes(data))
         
         # Root
         @self.app.route('/')
         def index():
-            """Serve main page"""
-            return self.get_dashboard_html()
+            """Serve main page (cached by browsers, revalidated by ETag)"""
+            if request.if_none_match.contains_weak(DASHBOARD_ETAG):
+                response = Response(status=304)
+            elif request.accept_encodings['gzip']:
+                response = Response(DASHBOARD_GZIP, mimetype='text/html')
+                response.headers['Content-Encoding'] = 'gzip'
+            else:
+                response = Response(DASHBOARD_BYTES, mimetype='text/html')
+            # Weak: the gzip and identity bodies share one validator
+            response.set_etag(DASHBOARD_ETAG, weak=True)
+            # Shared caches must not hand the gzip body to identity clients
+            response.vary.add('Accept-Encoding')
+            response.cache_control.public = True
+            response.cache_control.max_age = 3600
+            return response
+
+        @self.app.route('/static/dashboard.js')
+        def dashboard_js():
+            """Serve the dashboard script (cached for a year under its versioned URL)"""
+            if request.if_none_match.contains_weak(DASHBOARD_JS_ETAG):
+                response = Response(status=304)
+            elif request.accept_encodings['gzip']:
+                response = Response(DASHBOARD_JS_GZIP, mimetype='text/javascript')
+                response.headers['Content-Encoding'] = 'gzip'
+            else:
+                response = Response(DASHBOARD_JS_BYTES, mimetype='text/javascript')
+            response.set_etag(DASHBOARD_JS_ETAG, weak=True)
+            response.vary.add('Accept-Encoding')
+            response.cache_control.public = True
+            if request.args.get('v') == DASHBOARD_JS_ETAG[:12]:
+                response.cache_control.max_age = STATIC_MAX_AGE
+                response.cache_control.immutable = True
+            else:
+                response.cache_control.no_cache = True
+            return response
     
     def get_dashboard_html(self) -> str:
         """Get HTML for web dashboard"""
-        return """
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>P2P Storage - Dashboard</title>
-            <style>
-                * { margin: 0; padding: 0; box-sizing: border-box; }
-                
-                body {
-                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    min-height: 100vh;
-                    padding: 20px;
-                }
-                
-                .container {
-                    max-width: 1400px;
-                    margin: 0 auto;
-                }
-                
-                .header {
-                    color: white;
-                    text-align: center;
-                    margin-bottom: 40px;
-                }
-                
-                .header h1 {
-                    font-size: 2.5em;
-                    margin-bottom: 10px;
-                }
-                
-                .header p {
-                    font-size: 1.1em;
-                    opacity: 0.9;
-                }
-                
-                .dashboard {
-                    display: grid;
-                    grid-template-columns: repeat(auto-fit, minmax(350px, 1fr));
-                    gap: 20px;
-                    margin-bottom: 30px;
-                }
-                
-                .card {
-                    background: white;
-                    border-radius: 12px;
-                    padding: 25px;
-                    box-shadow: 0 10px 40px rgba(0,0,0,0.1);
-                    transition: transform 0.3s ease, box-shadow 0.3s ease;
-                }
-                
-                .card:hover {
-                    transform: translateY(-5px);
-                    box-shadow: 0 15px 50px rgba(0,0,0,0.15);
-                }
-                
-                .card h2 {
-                    color: #333;
-                    margin-bottom: 15px;
-                    font-size: 1.3em;
-                }
-                
-                .card .stat {
-                    display: flex;
-                    justify-content: space-between;
-                    align-items: center;
-                    margin: 10px 0;
-                    padding: 10px 0;
-                    border-bottom: 1px solid #eee;
-                }
-                
-                .card .stat:last-child {
-                    border-bottom: none;
-                }
-                
-                .card .stat label {
-                    color: #666;
-                    font-weight: 500;
-                }
-                
-                .card .stat value {
-                    color: #333;
-                    font-weight: bold;
-                    font-size: 1.1em;
-                }
-                
-                .status-badge {
-                    display: inline-block;
-                    padding: 5px 12px;
-                    border-radius: 20px;
-                    font-size: 0.85em;
-                    font-weight: bold;
-                }
-                
-                .status-online { background: #4caf50; color: white; }
-                .status-offline { background: #f44336; color: white; }
+        return DASHBOARD_HTML
+    
+    def run(self, debug: bool = False, threads: int = None):
+        """
+        Start the web server
 
-                /* Highlight selected node */
-                .selected-node { background: #f5f8ff; border-left: 4px solid #667eea; }
-                
-                .progress-bar {
-                    width: 100%;
-                    height: 8px;
-                    background: #eee;
-                    border-radius: 4px;
-                    overflow: hidden;
-                    margin: 10px 0;
-                }
-                
-                .progress-bar-fill {
-                    height: 100%;
-                    background: linear-gradient(90deg, #667eea, #764ba2);
-                    transition: width 0.3s ease;
-                }
-                
-                .button-group {
-                    display: flex;
-                    gap: 10px;
-                    margin-top: 15px;
-                }
-                
-                button {
-                    flex: 1;
-                    padding: 10px 15px;
-                    border: none;
-                    border-radius: 6px;
-                    background: #667eea;
-                    color: white;
-                    font-weight: bold;
-                    cursor: pointer;
-                    transition: background 0.3s ease;
-                }
-                
-                button:hover {
-                    background: #764ba2;
-                }
-                
-                .footer {
-                    text-align: center;
-                    color: white;
-                    margin-top: 40px;
-                    opacity: 0.8;
-                }
-            </style>
-        </head>
-        <body>
-            <!-- Login Modal -->
-            <div id="login-modal" style="position:fixed; top:0; left:0; width:100%; height:100%; background:rgba(0,0,0,0.5); z-index:1000; display:flex; align-items:center; justify-content:center;">
-                <div style="background:white; padding:40px; border-radius:12px; box-shadow:0 20px 60px rgba(0,0,0,0.3); width:90%; max-width:400px;">
-                    <h2 style="margin-bottom:20px; color:#333;">Login to P2P Storage</h2>
-                    <form id="login-form" style="display:flex; flex-direction:column; gap:12px;">
-                        <input type="text" id="login-username" placeholder="Username" required style="padding:12px; border:1px solid #ddd; border-radius:6px; font-size:1em;">
-                        <input type="password" id="login-password" placeholder="Password" required style="padding:12px; border:1px solid #ddd; border-radius:6px; font-size:1em;">
-                        <button type="submit" style="padding:12px; background:#667eea; color:white; border:none; border-radius:6px; font-weight:bold; cursor:pointer;">Login</button>
-                        <p style="text-align:center; color:#666; font-size:0.9em;">Demo accounts: alice/alice123, bob/bob123, charlie/charlie123</p>
-                    </form>
-                </div>
-            </div>
-
-            <!-- OTP Modal -->
-            <div id="otp-modal" style="position:fixed; top:0; left:0; width:100%; height:100%; background:rgba(0,0,0,0.5); z-index:1001; display:none; align-items:center; justify-content:center;">
-                <div style="background:white; padding:40px; border-radius:12px; box-shadow:0 20px 60px rgba(0,0,0,0.3); width:90%; max-width:400px;">
-                    <h2 style="margin-bottom:20px; color:#333;">One-Time Password Verification</h2>
-                    <p style="margin-bottom:20px; color:#666;">A one-time password is required to complete login.</p>
-                    <form id="otp-form" style="display:flex; flex-direction:column; gap:12px;">
-                        <input type="text" id="otp-code" placeholder="Enter OTP code" required style="padding:12px; border:1px solid #ddd; border-radius:6px; font-size:1.2em; text-align:center; letter-spacing:2px;">
-                        <button type="submit" style="padding:12px; background:#667eea; color:white; border:none; border-radius:6px; font-weight:bold; cursor:pointer;">Verify & Login</button>
-                        <button type="button" onclick="getDemoOTP()" style="padding:12px; background:#4caf50; color:white; border:none; border-radius:6px; font-weight:bold; cursor:pointer;">Get Demo OTP</button>
-                        <p style="text-align:center; color:#666; font-size:0.85em;">Click "Get Demo OTP" to see the current one-time password for testing.</p>
-                    </form>
-                </div>
-            </div>
-            
-            <div class="container">
-                <div class="header">
-                    <h1>🖥️ P2P Distributed Storage</h1>
-                    <p>Secure, Decentralized File Storage System</p>
-                </div>
-                
-                <div class="dashboard" id="dashboard">
-                    <div class="card">
-                        <h2>📊 System Status</h2>
-                        <div class="stat">
-                            <label>Network Status:</label>
-                            <value><span class="status-badge status-online">ONLINE</span></value>
-                        </div>
-                        <div class="stat">
-                            <label>Active Nodes:</label>
-                            <value id="active-nodes">5/5</value>
-                        </div>
-                        <div class="stat">
-                            <label>Uptime:</label>
-                            <value id="uptime">00:00:00</value>
-                        </div>
-                    </div>
-                    
-                    <div class="card">
-                        <h2>💾 Storage Overview</h2>
-                        <div class="stat">
-                            <label>Total Capacity:</label>
-                            <value id="total-capacity">50 GB</value>
-                        </div>
-                        <div class="stat">
-                            <label>Used Space:</label>
-                            <value id="used-space">0 GB</value>
-                        </div>
-                        <div class="stat">
-                            <label>Available:</label>
-                            <value id="available-space">50 GB</value>
-                        </div>
-                        <div class="progress-bar">
-                            <div class="progress-bar-fill" id="storage-fill" style="width: 0%"></div>
-                        </div>
-                    </div>
-                    
-                    <div class="card">
-                        <h2>📁 Files</h2>
-
-                        <div style="margin-bottom:12px">
-                            <div id="preferred-node" style="margin-bottom:8px; color:#333; font-weight:600;">Preferred node: <span id="preferred-node-name">None</span></div>
-                            <form id="upload-form">
-                                <input type="file" id="file-input" name="file" />
-                                <button type="submit">Upload</button>
-                            </form>
-                            <div class="progress-bar" style="margin-top:8px;">
-                                <div class="progress-bar-fill" id="upload-progress" style="width: 0%"></div>
-                            </div>
-                        </div>
-
-                        <div style="margin-top:14px">
-                            <label style="display:block; margin-bottom:6px; color:#666;">Files in Network</label>
-                            <div id="files-list" style="max-height:240px; overflow:auto;"></div>
-                        </div>
-                    </div>
-                    
-                    <div class="card">
-                        <h2>🌐 Network Statistics</h2>
-                        <div class="stat">
-                            <label>Packets Sent:</label>
-                            <value id="packets-sent">0</value>
-                        </div>
-                        <div class="stat">
-                            <label>Packets Received:</label>
-                            <value id="packets-received">0</value>
-                        </div>
-                        <div class="stat">
-                            <label>Throughput:</label>
-                            <value id="throughput">0 Mbps</value>
-                        </div>
-                    </div>
-                    
-                    <div class="card">
-                        <h2>🧩 Nodes</h2>
-                        <div id="nodes-list" style="max-height:240px; overflow:auto; padding-top:6px;"></div>
-                        <div style="margin-top:10px; text-align:right;">
-                            <button onclick="loadNodes()">Refresh Nodes</button>
-                        </div>
-                    </div>
-                    
-                    <div class="card">
-                        <h2>🔐 Security</h2>
-                        <div class="stat">
-                            <label>Authenticated User:</label>
-                            <value id="current-user">Not logged in</value>
-                        </div>
-                        <div class="stat">
-                            <label>OTP Enabled:</label>
-                            <value id="otp-status">Disabled</value>
-                        </div>
-                        <div class="button-group">
-                            <button onclick="enableOTP()">🔑 Enable OTP</button>
-                            <button onclick="logout()">🚪 Logout</button>
-                        </div>
-                    </div>
-                    
-                    <div class="card">
-                        <h2>⚡ Performance</h2>
-                        <div class="stat">
-                            <label>Avg Latency:</label>
-                            <value id="avg-latency">0 ms</value>
-                        </div>
-                        <div class="stat">
-                            <label>Packet Loss:</label>
-                            <value id="packet-loss">0%</value>
-                        </div>
-                        <div class="stat">
-                            <label>Response Time:</label>
-                            <value id="response-time">0 ms</value>
-                        </div>
-                    </div>
-                </div>
-                
-                <div class="footer">
-                    <p>P2P Storage System v1.0 | Powered by Python, gRPC & Flask</p>
-                    <p>© 2025 | Distributed Systems Research</p>
-                </div>
-            </div>
-            
-            <script>
-                // Check if user is logged in on page load
-                async function checkLogin() {
-                    try {
-                        const resp = await fetch('/api/files/list', {
-                            credentials: 'include'
-                        });
-                        if (resp.status === 401) {
-                            document.getElementById('login-modal').style.display = 'flex';
-                            document.getElementById('dashboard').style.display = 'none';
-                        } else {
-                            document.getElementById('login-modal').style.display = 'none';
-                            document.getElementById('dashboard').style.display = 'grid';
-                            loadFiles();
-                            loadNodes();
-                        }
-                    } catch (err) {
-                        console.error('Auth check failed:', err);
-                        document.getElementById('login-modal').style.display = 'flex';
-                    }
-                }
-
-                // Handle login
-                document.getElementById('login-form').addEventListener('submit', async (e) => {
-                    e.preventDefault();
-                    const username = document.getElementById('login-username').value;
-                    const password = document.getElementById('login-password').value;
-
-                    try {
-                        const resp = await fetch('/api/auth/login', {
-                            method: 'POST',
-                            headers: { 'Content-Type': 'application/json' },
-                            credentials: 'include',
-                            body: JSON.stringify({ username, password })
-                        });
-
-                        const data = await resp.json();
-                        if (resp.ok) {
-                            console.log('Login successful, user:', username);
-                            document.getElementById('current-user').textContent = username;
-                            document.getElementById('login-modal').style.display = 'none';
-                            document.getElementById('dashboard').style.display = 'grid';
-                            document.getElementById('login-form').reset();
-                            loadFiles();
-                            loadNodes();
-                        } else if (data.otp_required) {
-                            console.log('OTP verification required');
-                            // Store username and password for OTP submission
-                            window.otpPending = { username, password };
-                            document.getElementById('login-modal').style.display = 'none';
-                            document.getElementById('otp-modal').style.display = 'flex';
-                        } else {
-                            alert('Login failed: ' + (data.error || 'Unknown error'));
-                        }
-                    } catch (err) {
-                        console.error('Login error:', err);
-                        alert('Login error: ' + err);
-                    }
-                });
-
-                // Handle OTP submission
-                document.getElementById('otp-form').addEventListener('submit', async (e) => {
-                    e.preventDefault();
-                    const otp_code = document.getElementById('otp-code').value;
-                    const { username, password } = window.otpPending || {};
-
-                    if (!username || !password) {
-                        alert('Session expired. Please login again.');
-                        document.getElementById('otp-modal').style.display = 'none';
-                        document.getElementById('login-modal').style.display = 'flex';
-                        return;
-                    }
-
-                    try {
-                        const resp = await fetch('/api/auth/login', {
-                            method: 'POST',
-                            headers: { 'Content-Type': 'application/json' },
-                            credentials: 'include',
-                            body: JSON.stringify({ username, password, otp_code })
-                        });
-
-                        const data = await resp.json();
-                        if (resp.ok) {
-                            console.log('OTP verification successful');
-                            document.getElementById('current-user').textContent = username;
-                            document.getElementById('otp-modal').style.display = 'none';
-                            document.getElementById('dashboard').style.display = 'grid';
-                            document.getElementById('otp-form').reset();
-                            window.otpPending = null;
-                            loadFiles();
-                            loadNodes();
-                        } else {
-                            alert('OTP verification failed: ' + (data.error || 'Invalid code'));
-                            document.getElementById('otp-code').value = '';
-                        }
-                    } catch (err) {
-                        console.error('OTP error:', err);
-                        alert('OTP error: ' + err);
-                    }
-                });
-
-                // Get demo OTP code
-                async function getDemoOTP() {
-                    const { username } = window.otpPending || {};
-                    if (!username) {
-                        alert('No username available');
-                        return;
-                    }
-
-                    try {
-                        const resp = await fetch(`/api/auth/demo-otp?username=${username}`);
-                        const data = await resp.json();
-                        if (resp.ok) {
-                            document.getElementById('otp-code').value = data.otp_code;
-                            alert('Demo OTP populated! Click "Verify & Login" to complete.');
-                        } else {
-                            alert('Failed to get OTP: ' + (data.error || 'Unknown error'));
-                        }
-                    } catch (err) {
-                        alert('Error getting OTP: ' + err);
-                    }
-                }
-
-                // Upload form handling
-                const uploadForm = document.getElementById('upload-form');
-                const fileInput = document.getElementById('file-input');
-                const uploadProgress = document.getElementById('upload-progress');
-                const filesList = document.getElementById('files-list');
-
-                uploadForm.addEventListener('submit', async (e) => {
-                    e.preventDefault();
-                    const file = fileInput.files[0];
-                    if (!file) { alert('Please choose a file to upload'); return; }
-
-                    const formData = new FormData();
-                    formData.append('file', file);
-
-                    try {
-                        const xhr = new XMLHttpRequest();
-                        xhr.open('POST', '/api/files/upload', true);
-                        xhr.upload.onprogress = function(evt) {
-                            if (evt.lengthComputable) {
-                                const pct = Math.round((evt.loaded / evt.total) * 100);
-                                uploadProgress.style.width = pct + '%';
-                            }
-                        };
-
-                        xhr.onload = function() {
-                            if (xhr.status >= 200 && xhr.status < 300) {
-                                uploadProgress.style.width = '0%';
-                                fileInput.value = '';
-                                loadFiles();
-                                alert('Upload complete');
-                            } else {
-                                alert('Upload failed: ' + xhr.responseText);
-                            }
-                        };
-
-                        xhr.onerror = function() {
-                            alert('Upload error');
-                        };
-
-                        xhr.send(formData);
-
-                    } catch (err) {
-                        alert('Upload error: ' + err);
-                    }
-                });
-
-                // Load file list from server
-                async function loadFiles() {
-                    try {
-                        const resp = await fetch('/api/files/list', {
-                            credentials: 'include'
-                        });
-                        if (!resp.ok) throw new Error('Failed to fetch files');
-                        const data = await resp.json();
-                        const list = data.files || [];
-                        filesList.innerHTML = '';
-
-                        if (list.length === 0) {
-                            filesList.innerHTML = '<div style="color:#666">No files stored</div>';
-                            return;
-                        }
-
-                        list.forEach(f => {
-                            const row = document.createElement('div');
-                            row.style.padding = '8px 6px';
-                            row.style.borderBottom = '1px solid #eee';
-                            row.style.display = 'flex';
-                            row.style.justifyContent = 'space-between';
-                            row.style.alignItems = 'center';
-
-                            const left = document.createElement('div');
-                            left.innerHTML = `<strong>${f.filename}</strong><div style="font-size:0.85em;color:#666">${(f.size_mb||0).toFixed(2)} MB — ${f.chunks} chunks — stored on ${f.stored_on}</div>`;
-
-                            const right = document.createElement('div');
-                            const btn = document.createElement('button');
-                            btn.textContent = 'Download';
-                            btn.style.background = '#4caf50';
-                            btn.onclick = () => showDownloadNodeSelector(f.file_id, f.filename);
-
-                            right.appendChild(btn);
-                            row.appendChild(left);
-                            row.appendChild(right);
-                            filesList.appendChild(row);
-                        });
-
-                    } catch (err) {
-                        filesList.innerHTML = '<div style="color:#c00">Failed to load files</div>';
-                        console.error(err);
-                    }
-                }
-
-                    // Load nodes and show status + allow selection
-                    async function loadNodes() {
-                        try {
-                            const resp = await fetch('/api/nodes', { credentials: 'include' });
-                            if (!resp.ok) throw new Error('Failed to fetch nodes');
-                            const data = await resp.json();
-                            const list = data.nodes || [];
-                            const preferred = data.preferred || null;
-                            const nodesList = document.getElementById('nodes-list');
-                            nodesList.innerHTML = '';
-
-                            if (list.length === 0) {
-                                nodesList.innerHTML = '<div style="color:#666">No nodes available</div>';
-                                return;
-                            }
-
-                                // update preferred display
-                                const prefNameEl = document.getElementById('preferred-node-name');
-                                if (prefNameEl) prefNameEl.textContent = preferred || 'None';
-
-                                list.forEach(n => {
-                                    const row = document.createElement('div');
-                                    row.style.padding = '8px 6px';
-                                    row.style.borderBottom = '1px solid #eee';
-                                    row.style.display = 'flex';
-                                    row.style.justifyContent = 'space-between';
-                                    row.style.alignItems = 'center';
-
-                                    const left = document.createElement('div');
-                                    left.innerHTML = `<strong>${n.node_id}</strong><div style="font-size:0.85em;color:#666">${n.ip} — ${n.used_gb.toFixed(2)} / ${n.capacity_gb.toFixed(2)} GB</div>`;
-
-                                    const right = document.createElement('div');
-                                    const status = document.createElement('span');
-                                    status.textContent = n.status === 'ALIVE' ? 'ONLINE' : 'OFFLINE';
-                                    status.className = n.status === 'ALIVE' ? 'status-badge status-online' : 'status-badge status-offline';
-                                    status.style.marginRight = '10px';
-
-                                    const btn = document.createElement('button');
-                                    btn.textContent = preferred === n.node_id ? 'Selected' : 'Select';
-                                    btn.disabled = preferred === n.node_id;
-                                    btn.onclick = async () => {
-                                        try {
-                                            const sel = await fetch('/api/nodes/select', {
-                                                method: 'POST',
-                                                headers: { 'Content-Type': 'application/json' },
-                                                credentials: 'include',
-                                                body: JSON.stringify({ node_id: n.node_id })
-                                            });
-                                            if (!sel.ok) throw new Error('Select failed');
-                                            await loadNodes();
-                                            alert('Preferred node set to ' + n.node_id);
-                                        } catch (err) {
-                                            alert('Failed to select node: ' + err);
-                                        }
-                                    };
-
-                                    // highlight selected row
-                                    if (preferred === n.node_id) {
-                                        row.classList.add('selected-node');
-                                    }
-
-                                    right.appendChild(status);
-                                    right.appendChild(btn);
-                                    row.appendChild(left);
-                                    row.appendChild(right);
-                                    nodesList.appendChild(row);
-                                });
-
-                        } catch (err) {
-                            document.getElementById('nodes-list').innerHTML = '<div style="color:#c00">Failed to load nodes</div>';
-                            console.error(err);
-                        }
-                    }
-                
-                // Show node selector modal for download
-                async function showDownloadNodeSelector(fileId, filename) {
-                    try {
-                        const resp = await fetch('/api/nodes', { credentials: 'include' });
-                        if (!resp.ok) throw new Error('Failed to fetch nodes');
-                        const data = await resp.json();
-                        const nodes = data.nodes || [];
-                        
-                        if (nodes.length === 0) {
-                            alert('No nodes available');
-                            return;
-                        }
-                        
-                        // Create modal dynamically
-                        const modal = document.createElement('div');
-                        modal.style.position = 'fixed';
-                        modal.style.top = '0';
-                        modal.style.left = '0';
-                        modal.style.width = '100%';
-                        modal.style.height = '100%';
-                        modal.style.background = 'rgba(0,0,0,0.5)';
-                        modal.style.display = 'flex';
-                        modal.style.alignItems = 'center';
-                        modal.style.justifyContent = 'center';
-                        modal.style.zIndex = '9999';
-                        
-                        const content = document.createElement('div');
-                        content.style.background = 'white';
-                        content.style.padding = '20px';
-                        content.style.borderRadius = '8px';
-                        content.style.width = '400px';
-                        content.style.maxHeight = '60vh';
-                        content.style.overflowY = 'auto';
-                        content.style.boxShadow = '0 4px 6px rgba(0,0,0,0.1)';
-                        
-                        const title = document.createElement('h3');
-                        title.textContent = 'Download from Node';
-                        title.style.marginTop = '0';
-                        content.appendChild(title);
-                        
-                        const desc = document.createElement('p');
-                        desc.textContent = 'Select which node to reconstruct and download the file from:';
-                        desc.style.color = '#666';
-                        desc.style.fontSize = '0.9em';
-                        content.appendChild(desc);
-                        
-                        nodes.forEach(node => {
-                            const nodeBtn = document.createElement('button');
-                            nodeBtn.style.display = 'block';
-                            nodeBtn.style.width = '100%';
-                            nodeBtn.style.padding = '12px';
-                            nodeBtn.style.margin = '8px 0';
-                            nodeBtn.style.border = '1px solid #ddd';
-                            nodeBtn.style.borderRadius = '4px';
-                            nodeBtn.style.cursor = 'pointer';
-                            nodeBtn.style.background = node.status === 'ALIVE' ? '#f0f7ff' : '#f5f5f5';
-                            nodeBtn.style.textAlign = 'left';
-                            nodeBtn.innerHTML = `<strong>${node.node_id}</strong> (${node.status}) <br><small style="color:#666">${node.ip}</small>`;
-                            
-                            nodeBtn.onclick = async () => {
-                                modal.remove();
-                                await downloadById(fileId, filename, node.node_id);
-                            };
-                            
-                            nodeBtn.onmouseover = () => {
-                                nodeBtn.style.background = node.status === 'ALIVE' ? '#e8f4ff' : '#f0f0f0';
-                            };
-                            
-                            nodeBtn.onmouseout = () => {
-                                nodeBtn.style.background = node.status === 'ALIVE' ? '#f0f7ff' : '#f5f5f5';
-                            };
-                            
-                            if (node.status !== 'ALIVE') {
-                                nodeBtn.disabled = true;
-                                nodeBtn.style.opacity = '0.5';
-                                nodeBtn.style.cursor = 'not-allowed';
-                            }
-                            
-                            content.appendChild(nodeBtn);
-                        });
-                        
-                        const cancelBtn = document.createElement('button');
-                        cancelBtn.textContent = 'Cancel';
-                        cancelBtn.style.width = '100%';
-                        cancelBtn.style.padding = '12px';
-                        cancelBtn.style.margin = '16px 0 0 0';
-                        cancelBtn.style.background = '#ddd';
-                        cancelBtn.style.border = 'none';
-                        cancelBtn.style.borderRadius = '4px';
-                        cancelBtn.style.cursor = 'pointer';
-                        cancelBtn.onclick = () => modal.remove();
-                        content.appendChild(cancelBtn);
-                        
-                        modal.appendChild(content);
-                        document.body.appendChild(modal);
-                        
-                    } catch (err) {
-                        alert('Failed to show node selector: ' + err);
-                    }
-                }
-                
-                // Download by file id from specific node
-                async function downloadById(fileId, filename, nodeId) {
-                    try {
-                        let url = `/api/files/download/${fileId}`;
-                        if (nodeId) {
-                            url += `?node_id=${encodeURIComponent(nodeId)}`;
-                        }
-                        
-                        const resp = await fetch(url, {
-                            credentials: 'include'
-                        });
-                        if (!resp.ok) {
-                            const text = await resp.text();
-                            alert('Download failed: ' + text);
-                            return;
-                        }
-
-                        const blob = await resp.blob();
-                        const urlObj = window.URL.createObjectURL(blob);
-                        const a = document.createElement('a');
-                        a.href = urlObj;
-                        a.download = filename || fileId;
-                        document.body.appendChild(a);
-                        a.click();
-                        a.remove();
-                        window.URL.revokeObjectURL(urlObj);
-                    } catch (err) {
-                        alert('Download error: ' + err);
-                    }
-                }
-
-                function enableOTP() {
-                    alert('OTP setup is available via API; use the CLI or implement UI flows');
-                }
-
-                function logout() {
-                    fetch('/api/auth/logout', {
-                        method:'POST',
-                        credentials: 'include'
-                    })
-                        .then(()=>{ alert('Logged out'); window.location.reload(); })
-                        .catch(()=>{ alert('Logout failed'); });
-                }
-
-                // Auto-refresh dashboard data and file list
-                async function refreshDashboard() {
-                    try {
-                        // refresh files and storage stats
-                        await loadFiles();
-                        await loadNodes();
-                    } catch (e) { console.error(e); }
-                }
-
-                // initial load
-                checkLogin();
-                setInterval(refreshDashboard, 8000);
-            </script>
-        </body>
-        </html>
+        Uses Waitress with a thread pool so concurrent uploads/downloads are
+        not serialized; debug mode keeps Flask's reloading dev server.
+
+        Args:
+            debug: Run Flask's development server instead of Waitress
+            threads: Waitress worker threads (default: WEB_THREADS)
         """
-    
-    def run(self, debug: bool = False):
-        """Start the web server"""
         logger.info(f"[Web] Starting web server on {self.host}:{self.port}")
-        self.app.run(host=self.host, port=self.port, debug=debug)
+        if debug:
+            self.app.run(host=self.host, port=self.port, debug=True)
+            return
+
+        from waitress import serve
+        if threads is None:
+            threads = WEB_THREADS
+        logger.info(f"[Web] Serving with Waitress ({threads} threads)")
+        # Keep-alive connections stay open between dashboard polls;
+        # poll() instead of select() lifts the 1024 descriptor cap
+        serve(self.app, host=self.host, port=self.port, threads=threads,
+              connection_limit=500, asyncore_use_poll=True,
+              channel_timeout=300, cleanup_interval=30)
 
 
 def create_web_app(p2p_orchestrator):
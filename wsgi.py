@@ -7,6 +7,7 @@ Production deployment with Waitress (Windows-compatible)
 import sys
 import os
 import logging
+import threading
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -18,32 +19,50 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Import and initialize the P2P system
 from core.orchestrator import P2PStorageOrchestrator
 from web.web_server import create_web_app
 
-# Create orchestrator instance
-logger.info("[WSGI] Initializing P2P Storage System...")
-orchestrator = P2PStorageOrchestrator(
-    network_name='P2P_Storage_Network',
-    node_count=5,
-    storage_per_node_gb=10
-)
-orchestrator.initialize_nodes()
-orchestrator.start_network()
+# The P2P network is built on first use rather than at import, so a
+# process that only imports this module (a preloading master, tooling)
+# never starts nodes or allocates their storage
+orchestrator = None
+web_ui = None
+_init_lock = threading.Lock()
+
+
+def _get_web_ui():
+    """Create the orchestrator and Flask app once per process"""
+    global orchestrator, web_ui
+    if web_ui is None:
+        with _init_lock:
+            if web_ui is None:
+                logger.info("[WSGI] Initializing P2P Storage System...")
+                orchestrator = P2PStorageOrchestrator(
+                    network_name='P2P_Storage_Network',
+                    node_count=5,
+                    storage_per_node_gb=10
+                )
+                orchestrator.initialize_nodes()
+                orchestrator.start_network()
+                logger.info("[WSGI] P2P Storage System initialized")
+
+                web_ui = create_web_app(orchestrator)
+                logger.info("[WSGI] Flask app created and ready for Waitress")
+    return web_ui
 
-logger.info("[WSGI] P2P Storage System initialized")
 
-# Create Flask app
-web_ui = create_web_app(orchestrator)
-app = web_ui.app
+def app(environ, start_response):
+    """WSGI entry point; initializes the network on the first request"""
+    return _get_web_ui().app(environ, start_response)
 
-logger.info("[WSGI] Flask app created and ready for Waitress")
 
 if __name__ == "__main__":
     # Production: use waitress
     # Run: python wsgi.py
     # Or: waitress-serve --port=5000 --host=0.0.0.0 wsgi:app
-    from waitress import serve
-    logger.info("[WSGI] Starting Waitress server on http://0.0.0.0:5000")
-    serve(app, host='0.0.0.0', port=5000, threads=4)
+    # Linux alternative (one orchestrator per worker process):
+    #   gunicorn -k gevent -w 1 --worker-connections 1000 wsgi:app
+    # Each worker builds its network on its first request (so --preload
+    # starts nothing in the master); extra workers would run separate networks
+    # Same Waitress settings as main.py; WEB_THREADS sets the thread count
+    _get_web_ui().run()